@@ -0,0 +1,175 @@
+"""
+PropertyConnect Admission Control
+Per-user token buckets and a bounded priority queue in front of LLM calls
+
+Requests that would wait longer than the queueing SLO are shed up front so the
+routes can answer with a degraded response instead of timing out. When the queue
+is full, a higher-priority arrival takes the place of the lowest-priority waiter.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Set, Tuple
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+
+
+class LoadShed(Exception):
+    """Raised when a request is not admitted to the LLM queue"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class RateLimited(LoadShed):
+    """Raised when a user has exhausted their token bucket"""
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+class AdmissionController:
+    """Bounded priority queue limiting concurrent LLM calls"""
+
+    def __init__(self, concurrency: int = 4, max_queue: int = 32, max_wait_seconds: float = 5.0,
+                 user_rate: float = 0.5, user_burst: float = 5, expected_service_seconds: float = 3.0,
+                 max_users: int = 10000):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_users = max_users
+
+        # Exponentially weighted moving average of LLM call duration
+        self.service_time = expected_service_seconds
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed: Counter = Counter()
+        self.waits: deque = deque(maxlen=1000)
+
+        self._waiting: List[Tuple[int, int]] = []
+        # Tickets pushed out of a full queue by higher-priority arrivals
+        self._evicted: Set[Tuple[int, int]] = set()
+        self._seq = itertools.count()
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._cond = threading.Condition()
+
+    def _take_token(self, user: str) -> bool:
+        bucket = self._buckets.get(user)
+        if bucket is None:
+            bucket = self._buckets[user] = TokenBucket(self.user_rate, self.user_burst)
+            if len(self._buckets) > self.max_users:
+                # Forget the least recently seen user; they start with a full bucket
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user)
+        return bucket.take()
+
+    def estimated_wait(self, level: int) -> float:
+        """Estimate queueing delay for a new request at the given priority level"""
+        ahead = sum(1 for waiting_level, _ in self._waiting if waiting_level <= level)
+        free = self.concurrency - self.in_flight
+        if free > ahead:
+            return 0.0
+        return (ahead - free + 1) / self.concurrency * self.service_time
+
+    def _shed(self, reason: str, error=LoadShed):
+        self.shed[reason] += 1
+        return error(reason)
+
+    @contextmanager
+    def admit(self, user: str, priority: str = 'normal') -> Iterator[None]:
+        """Hold an LLM slot for the duration of the block, or raise LoadShed"""
+        level = PRIORITIES[priority]
+        start = time.monotonic()
+
+        with self._cond:
+            if not self._take_token(user):
+                raise self._shed('rate_limited', RateLimited)
+            if self.estimated_wait(level) > self.max_wait_seconds:
+                raise self._shed('slo')
+            if len(self._waiting) >= self.max_queue:
+                # Lowest priority, and the most recent arrival within it
+                lowest = max(self._waiting)
+                if lowest[0] <= level:
+                    raise self._shed('queue_full')
+                self._waiting.remove(lowest)
+                heapq.heapify(self._waiting)
+                self._evicted.add(lowest)
+                self._cond.notify_all()
+
+            ticket = (level, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            deadline = start + self.max_wait_seconds
+
+            while ticket in self._evicted or self.in_flight >= self.concurrency or self._waiting[0] != ticket:
+                if ticket in self._evicted:
+                    self._evicted.discard(ticket)
+                    raise self._shed('queue_full')
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    raise self._shed('timeout')
+                self._cond.wait(remaining)
+
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            self.admitted += 1
+            self.waits.append(time.monotonic() - start)
+            # Let the next ticket check whether a slot is still free
+            self._cond.notify_all()
+
+        service_start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - service_start
+            with self._cond:
+                self.in_flight -= 1
+                self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, shed counts and wait time percentiles"""
+        with self._cond:
+            waits = sorted(self.waits)
+            return {
+                'in_flight': self.in_flight,
+                'queue_depth': len(self._waiting),
+                'concurrency': self.concurrency,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'shed': dict(self.shed),
+                'service_time_seconds': round(self.service_time, 3),
+                'wait_seconds': {
+                    'p50': round(waits[len(waits) // 2], 4) if waits else 0.0,
+                    'p95': round(waits[int(len(waits) * 0.95)], 4) if waits else 0.0,
+                    'max': round(waits[-1], 4) if waits else 0.0
+                }
+            }
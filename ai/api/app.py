@@ -1,12 +1,25 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, has_request_context
 from flask_cors import CORS
 import os
+import hmac
 from dotenv import load_dotenv
 import openai
 import redis
 import json
+import threading
+import time
 from datetime import datetime
 
+from api.admission import AdmissionController, LoadShed, RateLimited
+from api.cache import CircuitBreaker, GuardedRedis, ResilientCache, create_pool
+from api.dedup import NearDuplicateIndex, SignatureStore
+from api.interaction_log import InteractionLogger
+from api.jobs import JobQueue
+from api.locations import location_resolver
+from api.profiler import SamplingProfiler
+from api.recommender import PropertyCatalog, CatalogStore
+from chatbot.responses import response_generator
+
 # Load environment variables
 load_dotenv()
 
@@ -16,8 +29,153 @@ CORS(app)
 # Configure OpenAI
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
-# Configure Redis
-redis_client = redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379'))
+# Configure Redis with bounded pools and tight timeouts. Every Redis user on the
+# request path shares one circuit breaker, so a degraded Redis is bypassed
+# instead of costing each request a timeout per call
+redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
+redis_breaker = CircuitBreaker()
+redis_client = GuardedRedis(redis.Redis(connection_pool=create_pool(redis_url)), redis_breaker)
+cache = ResilientCache(redis_client.client, redis_breaker)
+
+# Configure background job queue; only the workers' blocking pop uses a pool
+# with a timeout longer than the pop
+queue_redis = redis.Redis(connection_pool=create_pool(redis_url, socket_timeout=30))
+job_queue = JobQueue(
+    redis_client,
+    callback_hosts=os.getenv('JOB_CALLBACK_HOSTS', '').split(','),
+    blocking_client=queue_redis
+)
+
+# Configure recommendation catalog, shared between workers through Redis
+property_catalog = PropertyCatalog(location_resolver=location_resolver)
+catalog_store = CatalogStore(redis_client, property_catalog)
+
+# Seconds a property analysis stays cached
+ANALYSIS_TTL = 3600
+
+# Configure near-duplicate detection so re-listed properties reuse their analysis;
+# signatures expire with the analyses they point to
+duplicate_index = NearDuplicateIndex(location_resolver=location_resolver)
+duplicate_store = SignatureStore(redis_client, duplicate_index, ttl=ANALYSIS_TTL)
+
+# Configure admission control for LLM calls (per worker process)
+admission = AdmissionController(
+    concurrency=int(os.getenv('LLM_CONCURRENCY', 4)),
+    max_queue=int(os.getenv('LLM_MAX_QUEUE', 32)),
+    max_wait_seconds=float(os.getenv('LLM_MAX_WAIT_SECONDS', 5)),
+    user_rate=float(os.getenv('LLM_USER_RATE', 0.5)),
+    user_burst=float(os.getenv('LLM_USER_BURST', 5))
+)
+
+def get_client_id():
+    """Identify the caller for per-user rate limiting"""
+    return request.headers.get('X-User-Id') or request.remote_addr or 'anonymous'
+
+def run_llm(call, degraded, priority='normal'):
+    """Run an LLM call under admission control, falling back to a degraded result when shed"""
+    try:
+        with admission.admit(get_client_id(), priority):
+            return call()
+    except RateLimited:
+        raise
+    except LoadShed as e:
+        note_interaction(degraded=True, shed_reason=e.reason)
+        result = degraded()
+        result['degraded'] = True
+        result['shed_reason'] = e.reason
+        return result
+
+# Configure on-demand request profiling, toggled at runtime via /admin/profiler
+profiler = SamplingProfiler(redis_client)
+
+@app.before_request
+def start_profiling():
+    """Start sampling this request's stack if the profiler selects it"""
+    g.profile = profiler.start(request.method, request.path)
+
+@app.teardown_request
+def stop_profiling(exc=None):
+    """Stop sampling and keep the profile if it was sampled or slow"""
+    profiler.stop(g.pop('profile', None))
+
+# Configure the interaction log used for offline analytics and replay testing
+interaction_log = InteractionLogger(os.getenv('INTERACTION_LOG_DIR', 'logs/interactions'))
+
+# Endpoints whose requests are recorded in the interaction log
+LOGGED_ENDPOINTS = {'analyze_property', 'chat', 'market_insights', 'property_recommendations'}
+
+# Interaction record of the background job running on this thread, if any
+job_interaction = threading.local()
+
+def note_interaction(**fields):
+    """Attach details to the current request's or background job's interaction record"""
+    if has_request_context():
+        g.setdefault('interaction', {}).update(fields)
+    elif getattr(job_interaction, 'fields', None) is not None:
+        job_interaction.fields.update(fields)
+
+def logged_job(kind, handler):
+    """Wrap a job handler so each run is recorded in the interaction log like a request"""
+    def run(payload):
+        job_interaction.fields = {}
+        started = time.perf_counter()
+        status = 'failed'
+        try:
+            result = handler(payload)
+            status = 'done'
+            return result
+        finally:
+            interaction_log.log({
+                'kind': kind,
+                'job_id': job_queue.current_job_id(),
+                'status': status,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                'request': payload,
+                **job_interaction.fields
+            })
+            job_interaction.fields = None
+    return run
+
+def token_usage(response):
+    """Total tokens reported by an OpenAI completion, if any"""
+    return getattr(getattr(response, 'usage', None), 'total_tokens', None)
+
+@app.before_request
+def start_interaction():
+    """Remember when the request started for the interaction log"""
+    g.interaction_started = time.perf_counter()
+
+@app.after_request
+def log_interaction(response):
+    """Enqueue an interaction record for logged endpoints; never blocks the request"""
+    if request.endpoint in LOGGED_ENDPOINTS:
+        interaction_log.log({
+            'kind': request.endpoint,
+            'user': get_client_id(),
+            'status': response.status_code,
+            'latency_ms': round((time.perf_counter() - g.interaction_started) * 1000, 2),
+            'request': request.get_json(silent=True) if request.method == 'POST' else request.args.to_dict(),
+            **g.get('interaction', {})
+        })
+    return response
+
+def has_token(header, variable):
+    """Check a request header against a configured token; never matches when none is configured"""
+    token = os.getenv(variable)
+    supplied = request.headers.get(header, '')
+    return bool(token) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+def is_admin():
+    """Check the admin token; admin endpoints are disabled when none is configured"""
+    return has_token('X-Admin-Token', 'AI_ADMIN_TOKEN')
+
+def is_trusted_service():
+    """Check the service token of internal callers (e.g. the backend), or the admin token"""
+    return has_token('X-Service-Token', 'AI_SERVICE_TOKEN') or is_admin()
+
+def rate_limited_response():
+    """Response for callers that exhausted their LLM token bucket"""
+    return jsonify({'error': 'Rate limit exceeded'}), 429
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -28,6 +186,145 @@ def health_check():
         'service': 'ai-service'
     })
 
+def generate_property_analysis(property_data):
+    """Run the LLM analysis for a property and cache it"""
+    # Create analysis prompt
+    prompt = f"""
+    Analyze the following property and provide market insights:
+    
+    Property Details:
+    - Type: {property_data.get('type', 'Unknown')}
+    - Price: ${property_data.get('price', 0):,}
+    - Location: {property_data.get('address', 'Unknown')}
+    - Bedrooms: {property_data.get('bedrooms', 'Unknown')}
+    - Bathrooms: {property_data.get('bathrooms', 'Unknown')}
+    - Area: {property_data.get('area', 'Unknown')} sqft
+    
+    Please provide:
+    1. Market analysis
+    2. Price comparison
+    3. Investment potential
+    4. Neighborhood insights
+    5. Recommendations
+    """
+    
+    # Get AI analysis
+    response = openai.ChatCompletion.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a real estate market analyst. Provide detailed, professional analysis of properties."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=1000,
+        temperature=0.7
+    )
+    
+    analysis = response.choices[0].message.content
+    note_interaction(tokens=token_usage(response))
+    
+    # Cache the analysis along with the attributes a re-listing must match to reuse it
+    cache_key = f"property_analysis:{property_data.get('id', 'unknown')}"
+    cache.setex(cache_key, ANALYSIS_TTL, json.dumps({
+        'analysis': analysis,
+        'price': property_data.get('price'),
+        'listing': duplicate_index.identity(property_data),
+        'timestamp': datetime.utcnow().isoformat()
+    }))
+    
+    # Index the listing so near-duplicates can reuse this analysis
+    if property_data.get('id') is not None and duplicate_index.comparable(property_data):
+        duplicate_store.add(property_data['id'], duplicate_index.signature(property_data))
+    
+    return {
+        'analysis': analysis,
+        'property_id': property_data.get('id'),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def reuse_duplicate_analysis(property_data):
+    """Reuse the cached analysis of an already analysed listing of the same property, if any"""
+    if not duplicate_index.comparable(property_data):
+        return None
+    
+    # A listing never reuses its own earlier analysis
+    own_id = str(property_data.get('id', 'unknown'))
+    duplicate_store.sync()
+    match = duplicate_index.query(duplicate_index.signature(property_data),
+                                  accept=lambda candidate: candidate != own_id)
+    if not match:
+        return None
+    
+    duplicate_id, similarity = match
+    cached = cache.get(f"property_analysis:{duplicate_id}")
+    if not cached:
+        return None
+    
+    # Similar text is not enough: the identifying attributes must agree too
+    cached = json.loads(cached)
+    if not duplicate_index.same_property(duplicate_index.identity(property_data), cached.get('listing')):
+        return None
+    source_id = cached.get('reused_from') or duplicate_id
+    if source_id == own_id:
+        return None
+    
+    # Keep the record as written for the source listing, so later re-listings
+    # are compared with the price and attributes the analysis was written for
+    cache.setex(f"property_analysis:{own_id}", ANALYSIS_TTL, json.dumps({**cached, 'reused_from': source_id}))
+    
+    # Lightly adapt the analysis in the response when the re-listing changed the price
+    analysis = cached['analysis']
+    price, original_price = property_data.get('price'), cached.get('price')
+    if price and original_price and price != original_price:
+        analysis = (f"Note: this listing is priced at ${price:,} compared with ${original_price:,} "
+                    f"for the near-identical listing this analysis was written for.\n\n{analysis}")
+    
+    note_interaction(reused_from=source_id, similarity=round(similarity, 4))
+    
+    return {
+        'analysis': analysis,
+        'property_id': property_data.get('id'),
+        'reused_from': source_id,
+        'similarity': round(similarity, 4),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def analyze_property_job(property_data):
+    """Background job: reuse a near-duplicate's analysis or generate a new one"""
+    return reuse_duplicate_analysis(property_data) or generate_property_analysis(property_data)
+
+def degraded_property_analysis(property_data):
+    """Serve a cached analysis, or a template insight, when the LLM queue is overloaded"""
+    cached = cache.get(f"property_analysis:{property_data.get('id', 'unknown')}")
+    analysis = json.loads(cached)['analysis'] if cached else \
+        response_generator.generate_market_insight(property_data.get('address', 'this area'))
+    
+    return {
+        'analysis': analysis,
+        'property_id': property_data.get('id'),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+def enqueue_job(kind, payload, data):
+    """Enqueue a background job for an async request and return the 202 response"""
+    try:
+        job = job_queue.enqueue(
+            kind,
+            payload,
+            priority=data.get('priority', 'normal'),
+            callback_url=data.get('callbackUrl')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    note_interaction(job_id=job['id'])
+    return jsonify({
+        'success': True,
+        'data': {
+            'job_id': job['id'],
+            'status': job['status']
+        }
+    }), 202
+
 @app.route('/api/analyze-property', methods=['POST'])
 def analyze_property():
     """Analyze property data and provide insights"""
@@ -39,58 +336,47 @@ def analyze_property():
         
         property_data = data.get('property', {})
         
-        # Create analysis prompt
-        prompt = f"""
-        Analyze the following property and provide market insights:
-        
-        Property Details:
-        - Type: {property_data.get('type', 'Unknown')}
-        - Price: ${property_data.get('price', 0):,}
-        - Location: {property_data.get('address', 'Unknown')}
-        - Bedrooms: {property_data.get('bedrooms', 'Unknown')}
-        - Bathrooms: {property_data.get('bathrooms', 'Unknown')}
-        - Area: {property_data.get('area', 'Unknown')} sqft
-        
-        Please provide:
-        1. Market analysis
-        2. Price comparison
-        3. Investment potential
-        4. Neighborhood insights
-        5. Recommendations
-        """
-        
-        # Get AI analysis
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a real estate market analyst. Provide detailed, professional analysis of properties."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
-        
-        analysis = response.choices[0].message.content
-        
-        # Cache the analysis
-        cache_key = f"property_analysis:{property_data.get('id', 'unknown')}"
-        redis_client.setex(cache_key, 3600, json.dumps({
-            'analysis': analysis,
-            'timestamp': datetime.utcnow().isoformat()
-        }))
+        if data.get('async'):
+            return enqueue_job('analyze_property', property_data, data)
         
         return jsonify({
             'success': True,
-            'data': {
-                'analysis': analysis,
-                'property_id': property_data.get('id'),
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            'data': reuse_duplicate_analysis(property_data) or run_llm(
+                lambda: generate_property_analysis(property_data),
+                lambda: degraded_property_analysis(property_data)
+            )
         })
         
+    except RateLimited:
+        return rate_limited_response()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def generate_chat_response(message, context):
+    """Run the LLM chat completion for a message"""
+    # Create context-aware prompt
+    system_prompt = """You are a helpful real estate assistant. You help users find properties, understand market trends, and make informed decisions. Be friendly, professional, and provide accurate information."""
+    
+    user_prompt = f"""
+    User Context: {context}
+    User Message: {message}
+    
+    Please provide a helpful response about real estate.
+    """
+    
+    response = openai.ChatCompletion.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        max_tokens=500,
+        temperature=0.7
+    )
+    
+    note_interaction(tokens=token_usage(response))
+    return {'response': response.choices[0].message.content}
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Handle chat messages with AI"""
@@ -102,39 +388,50 @@ def chat():
         if not message:
             return jsonify({'error': 'No message provided'}), 400
         
-        # Create context-aware prompt
-        system_prompt = """You are a helpful real estate assistant. You help users find properties, understand market trends, and make informed decisions. Be friendly, professional, and provide accurate information."""
-        
-        user_prompt = f"""
-        User Context: {context}
-        User Message: {message}
+        last_intent = context.get('last_intent', '') if isinstance(context, dict) else ''
         
-        Please provide a helpful response about real estate.
-        """
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7
+        result = run_llm(
+            lambda: generate_chat_response(message, context),
+            lambda: {'response': response_generator.get_response_by_intent(last_intent)},
+            priority='high'
         )
-        
-        ai_response = response.choices[0].message.content
+        result['timestamp'] = datetime.utcnow().isoformat()
         
         return jsonify({
             'success': True,
-            'data': {
-                'response': ai_response,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            'data': result
         })
         
+    except RateLimited:
+        return rate_limited_response()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def generate_market_insights(location):
+    """Run the LLM market insights for a location"""
+    prompt = f"""
+    Provide market insights for {location}:
+    
+    1. Current market trends
+    2. Average property prices
+    3. Market demand
+    4. Investment opportunities
+    5. Future outlook
+    """
+    
+    response = openai.ChatCompletion.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a real estate market analyst. Provide detailed market insights."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=800,
+        temperature=0.7
+    )
+    
+    note_interaction(tokens=token_usage(response))
+    return {'insights': response.choices[0].message.content}
+
 @app.route('/api/market-insights', methods=['GET'])
 def market_insights():
     """Get market insights for a location"""
@@ -144,94 +441,205 @@ def market_insights():
         if not location:
             return jsonify({'error': 'Location parameter required'}), 400
         
-        # Check cache first
-        cache_key = f"market_insights:{location.lower().replace(' ', '_')}"
-        cached_data = redis_client.get(cache_key)
+        # Key the cache on the canonical region so different spellings share it
+        region = location_resolver.resolve(location)
+        region_key = region['id'] if region else location.lower().replace(' ', '_')
+        cache_key = f"market_insights:{region_key}"
+        cached_data = cache.get(cache_key)
+        
+        note_interaction(region=region['id'] if region else None, cache_hit=bool(cached_data))
         
         if cached_data:
-            return jsonify(json.loads(cached_data))
-        
-        # Generate market insights
-        prompt = f"""
-        Provide market insights for {location}:
-        
-        1. Current market trends
-        2. Average property prices
-        3. Market demand
-        4. Investment opportunities
-        5. Future outlook
-        """
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a real estate market analyst. Provide detailed market insights."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800,
-            temperature=0.7
+            result = json.loads(cached_data)
+            result['data']['location'] = location
+            return jsonify(result)
+        
+        # Generate insights for the canonical region name
+        region_name = region['name'] if region else location
+        insights = run_llm(
+            lambda: generate_market_insights(region_name),
+            lambda: {'insights': response_generator.generate_market_insight(region_name)}
         )
         
-        insights = response.choices[0].message.content
-        
         result = {
             'success': True,
             'data': {
                 'location': location,
-                'insights': insights,
+                'region': region,
+                **insights,
                 'timestamp': datetime.utcnow().isoformat()
             }
         }
         
         # Cache the insights for 24 hours
-        redis_client.setex(cache_key, 86400, json.dumps(result))
+        if not insights.get('degraded'):
+            cache.setex(cache_key, 86400, json.dumps(result))
         
         return jsonify(result)
         
+    except RateLimited:
+        return rate_limited_response()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def generate_property_recommendations(user_preferences, listings=None):
+    """Run the LLM recommendations for a set of user preferences"""
+    prompt = f"""
+    Based on these user preferences, provide property recommendations:
+    
+    Preferences:
+    - Budget: ${user_preferences.get('budget', 'Not specified')}
+    - Location: {user_preferences.get('location', 'Not specified')}
+    - Property Type: {user_preferences.get('propertyType', 'Not specified')}
+    - Bedrooms: {user_preferences.get('bedrooms', 'Not specified')}
+    - Bathrooms: {user_preferences.get('bathrooms', 'Not specified')}
+    
+    Please provide:
+    1. Recommended property types
+    2. Suggested locations
+    3. Price range recommendations
+    4. Key features to look for
+    5. Investment tips
+    """
+    
+    if listings:
+        prompt += f"""
+    Explain why these ranked listings (with per-feature match scores) suit the user:
+    {json.dumps(listings)}
+    """
+    
+    response = openai.ChatCompletion.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a real estate advisor. Provide personalized property recommendations."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=800,
+        temperature=0.7
+    )
+    
+    note_interaction(tokens=token_usage(response))
+    return response.choices[0].message.content
+
+def recommend_properties(user_preferences, limit=10, narrate=False):
+    """Rank catalog listings for the preferences, optionally narrated by the LLM"""
+    catalog_store.sync()
+    listings = property_catalog.recommend(user_preferences, limit)
+    
+    result = {
+        'listings': listings,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    
+    if narrate:
+        result['recommendations'] = generate_property_recommendations(user_preferences, listings)
+    
+    return result
+
 @app.route('/api/property-recommendations', methods=['POST'])
 def property_recommendations():
     """Get personalized property recommendations"""
     try:
         data = request.get_json()
-        user_preferences = data.get('preferences', {})
-        
-        prompt = f"""
-        Based on these user preferences, provide property recommendations:
-        
-        Preferences:
-        - Budget: ${user_preferences.get('budget', 'Not specified')}
-        - Location: {user_preferences.get('location', 'Not specified')}
-        - Property Type: {user_preferences.get('propertyType', 'Not specified')}
-        - Bedrooms: {user_preferences.get('bedrooms', 'Not specified')}
-        - Bathrooms: {user_preferences.get('bathrooms', 'Not specified')}
-        
-        Please provide:
-        1. Recommended property types
-        2. Suggested locations
-        3. Price range recommendations
-        4. Key features to look for
-        5. Investment tips
-        """
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a real estate advisor. Provide personalized property recommendations."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800,
-            temperature=0.7
-        )
+        payload = {
+            'preferences': data.get('preferences', {}),
+            'limit': int(data.get('limit', 10)),
+            'narrate': bool(data.get('narrate', False))
+        }
+        
+        if data.get('async'):
+            return enqueue_job('property_recommendations', payload, data)
+        
+        result = recommend_properties(payload['preferences'], payload['limit'])
+        
+        if payload['narrate']:
+            preferences, listings = payload['preferences'], result['listings']
+            result.update(run_llm(
+                lambda: {'recommendations': generate_property_recommendations(preferences, listings)},
+                lambda: {'recommendations': response_generator.generate_property_recommendation(preferences)},
+                priority='low'
+            ))
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except RateLimited:
+        return rate_limited_response()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/catalog/properties', methods=['PUT'])
+def upsert_catalog_properties():
+    """Add or update active listings in the recommendation catalog"""
+    if not is_trusted_service():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    try:
+        data = request.get_json()
         
-        recommendations = response.choices[0].message.content
+        if not data or not isinstance(data.get('properties'), list):
+            return jsonify({'error': 'properties list required'}), 400
+        
+        listings = data['properties']
+        catalog_store.upsert(listings)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'updated': len(listings),
+                'catalog_size': len(property_catalog)
+            }
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/catalog/properties/<property_id>', methods=['DELETE'])
+def remove_catalog_property(property_id):
+    """Remove a listing from the recommendation catalog"""
+    if not is_trusted_service():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    try:
+        if not catalog_store.remove(property_id):
+            return jsonify({'error': 'Property not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'property_id': property_id,
+                'catalog_size': len(property_catalog)
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/listings/dedupe', methods=['POST'])
+def dedupe_listings():
+    """Group a batch of listings into near-duplicate clusters"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('properties'), list):
+            return jsonify({'error': 'properties list required'}), 400
+        
+        listings = data['properties']
+        if any('id' not in listing for listing in listings):
+            return jsonify({'error': 'Every property needs an id'}), 400
+        
+        threshold = data.get('threshold')
+        clusters = duplicate_index.dedupe(listings, float(threshold) if threshold is not None else None)
         
         return jsonify({
             'success': True,
             'data': {
-                'recommendations': recommendations,
+                'clusters': clusters,
+                'duplicates': sum(len(cluster['duplicates']) for cluster in clusters),
                 'timestamp': datetime.utcnow().isoformat()
             }
         })
@@ -239,6 +647,106 @@ def property_recommendations():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """State of the Redis circuit breaker shared by this worker's cache and stores"""
+    return jsonify({
+        'success': True,
+        'data': {
+            **cache.stats(),
+            'pid': os.getpid(),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    })
+
+@app.route('/api/interactions/stats', methods=['GET'])
+def interaction_stats():
+    """Queued, written and dropped interaction records for this worker"""
+    return jsonify({
+        'success': True,
+        'data': {
+            **interaction_log.stats(),
+            'pid': os.getpid(),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    })
+
+@app.route('/api/admission/stats', methods=['GET'])
+def admission_stats():
+    """LLM queue depth, shed counts and wait times for this worker"""
+    return jsonify({
+        'success': True,
+        'data': {
+            **admission.stats(),
+            'pid': os.getpid(),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    })
+
+@app.route('/admin/profiler', methods=['GET', 'POST', 'DELETE'])
+def profiler_settings():
+    """Show, update or clear the request profiler"""
+    if not is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    try:
+        if request.method == 'POST':
+            config = profiler.configure(request.get_json() or {})
+        elif request.method == 'DELETE':
+            profiler.clear()
+            config = profiler.refresh_config(force=True)
+        else:
+            config = profiler.refresh_config(force=True)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'config': config,
+                'profiles': [
+                    {key: value for key, value in profile.items() if key != 'stacks'}
+                    for profile in profiler.profiles()
+                ]
+            }
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/admin/profiler/stacks', methods=['GET'])
+def profiler_stacks():
+    """Export profiled stacks in collapsed format for flame graph tools"""
+    if not is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    try:
+        return Response(profiler.collapsed(request.args.get('path')), mimetype='text/plain')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll the status and result of a background job"""
+    try:
+        job = job_queue.get(job_id)
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'data': job
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Background jobs for long-running analyses; run workers with `python -m api.jobs`
+job_queue.register('analyze_property', logged_job('analyze_property', analyze_property_job))
+job_queue.register('property_recommendations',
+                   logged_job('property_recommendations', lambda payload: recommend_properties(**payload)))
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
     app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_ENV') == 'development')
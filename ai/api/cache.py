@@ -0,0 +1,253 @@
+"""
+PropertyConnect Redis Access Layer
+Bounded connection pools, tight timeouts and a circuit breaker for the AI cache
+
+The cache is only an optimization, so a slow or unreachable Redis must never
+stall a request: operations time out quickly, and after repeated failures the
+circuit opens and the cache is bypassed entirely until Redis recovers. Other
+Redis users on the request path (catalog, signatures, profiler, job queue) share
+the same breaker through GuardedRedis, so they fail fast too.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+
+def create_pool(url: str, max_connections: Optional[int] = None,
+                socket_timeout: Optional[float] = None) -> redis.ConnectionPool:
+    """Connection pool with bounded size and per-operation timeouts"""
+    return redis.ConnectionPool.from_url(
+        url,
+        max_connections=max_connections or int(os.getenv('REDIS_MAX_CONNECTIONS', 50)),
+        socket_timeout=socket_timeout or float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.25)),
+        socket_connect_timeout=float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.25)),
+        health_check_interval=30
+    )
+
+
+def create_async_pool(url: str, max_connections: Optional[int] = None,
+                      socket_timeout: Optional[float] = None) -> aioredis.ConnectionPool:
+    """Async connection pool with bounded size and per-operation timeouts"""
+    return aioredis.ConnectionPool.from_url(
+        url,
+        max_connections=max_connections or int(os.getenv('REDIS_MAX_CONNECTIONS', 50)),
+        socket_timeout=socket_timeout or float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.25)),
+        socket_connect_timeout=float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.25)),
+        health_check_interval=30
+    )
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets a trial call through after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted"""
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                # Let one trial call through; push the next trial back a full cool-down
+                self.opened_at = time.monotonic()
+                return True
+            if state == 'open':
+                self.bypassed += 1
+                return False
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'state': self.state, 'failures': self.failures, 'bypassed': self.bypassed}
+
+
+class CircuitOpen(redis.ConnectionError):
+    """Raised instead of calling Redis while the circuit is open"""
+
+
+class GuardedRedis:
+    """Redis client whose commands and pipelines go through a circuit breaker
+
+    Failures and open-circuit rejections both raise redis.RedisError, so callers
+    keep their existing error handling but stop waiting on a degraded Redis.
+    """
+
+    def __init__(self, client, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+
+    def _guard(self, operation, *args, **kwargs):
+        if not self.breaker.allow():
+            raise CircuitOpen('Redis circuit breaker is open')
+        try:
+            result = operation(*args, **kwargs)
+        except redis.RedisError:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.client, name)
+        if not callable(attribute):
+            return attribute
+
+        def command(*args, **kwargs):
+            return self._guard(attribute, *args, **kwargs)
+        return command
+
+    def pipeline(self, transaction: bool = True) -> 'GuardedPipeline':
+        return GuardedPipeline(self, self.client.pipeline(transaction=transaction))
+
+
+class GuardedPipeline:
+    """Pipeline that buffers commands locally and executes them through the breaker"""
+
+    def __init__(self, guard: GuardedRedis, pipe):
+        self.guard = guard
+        self.pipe = pipe
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.pipe, name)
+        if not callable(attribute):
+            return attribute
+
+        def command(*args, **kwargs):
+            # Queued commands return the raw pipeline; keep chained calls guarded
+            result = attribute(*args, **kwargs)
+            return self if result is self.pipe else result
+        return command
+
+    def execute(self) -> List[Any]:
+        return self.guard._guard(self.pipe.execute)
+
+
+class ResilientCache:
+    """Cache operations that fail fast and degrade to cache misses"""
+
+    def __init__(self, client, breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+
+    def _call(self, operation, default=None):
+        if not self.breaker.allow():
+            return default
+        try:
+            result = operation()
+        except redis.RedisError as e:
+            self.breaker.record_failure()
+            print(f"Redis cache unavailable: {e}")
+            return default
+        self.breaker.record_success()
+        return result
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._call(lambda: self.client.get(key))
+
+    def setex(self, key: str, ttl: int, value: Any) -> bool:
+        return bool(self._call(lambda: self.client.setex(key, ttl, value), False))
+
+    def delete(self, *keys: str) -> int:
+        return self._call(lambda: self.client.delete(*keys), 0)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Fetch several keys in one round trip"""
+        if not keys:
+            return []
+        return self._call(lambda: self.client.mget(keys), [None] * len(keys))
+
+    def set_many(self, items: Dict[str, Any], ttl: int) -> bool:
+        """Set several keys with a TTL in one pipelined round trip"""
+        if not items:
+            return True
+
+        def operation():
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            return all(pipe.execute())
+
+        return bool(self._call(operation, False))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.breaker.stats()
+
+
+class AsyncResilientCache:
+    """Async counterpart of ResilientCache for asyncio serving paths"""
+
+    def __init__(self, client, breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.breaker = breaker or CircuitBreaker()
+
+    async def _call(self, operation, default=None):
+        if not self.breaker.allow():
+            return default
+        try:
+            result = await operation()
+        except (redis.RedisError, asyncio.TimeoutError) as e:
+            self.breaker.record_failure()
+            print(f"Redis cache unavailable: {e}")
+            return default
+        self.breaker.record_success()
+        return result
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._call(lambda: self.client.get(key))
+
+    async def setex(self, key: str, ttl: int, value: Any) -> bool:
+        return bool(await self._call(lambda: self.client.setex(key, ttl, value), False))
+
+    async def delete(self, *keys: str) -> int:
+        return await self._call(lambda: self.client.delete(*keys), 0)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Fetch several keys in one round trip"""
+        if not keys:
+            return []
+        return await self._call(lambda: self.client.mget(keys), [None] * len(keys))
+
+    async def set_many(self, items: Dict[str, Any], ttl: int) -> bool:
+        """Set several keys with a TTL in one pipelined round trip"""
+        if not items:
+            return True
+
+        async def operation():
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            return all(await pipe.execute())
+
+        return bool(await self._call(operation, False))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.breaker.stats()
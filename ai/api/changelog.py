@@ -0,0 +1,114 @@
+"""
+PropertyConnect Shared Change Log
+Replicates a Redis hash into per-process state through a capped change stream
+
+Writers update the hash and append the changed keys to a Redis stream that is
+trimmed to a bounded length, so Redis memory stays flat however many changes
+are made. Each process replays only the stream entries it has not seen; a
+process that has just started, or has fallen behind the trimmed part of the
+stream, reloads the whole hash instead.
+"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+
+def decode(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def stream_position(entry_id: str) -> Tuple[int, int]:
+    """Comparable (milliseconds, sequence) form of a stream entry id"""
+    millis, _, seq = entry_id.partition('-')
+    return int(millis), int(seq or 0)
+
+
+def entry_keys(fields) -> List[str]:
+    """Keys recorded in a change stream entry"""
+    for name, value in fields.items():
+        if decode(name) == 'keys':
+            return json.loads(decode(value))
+    return []
+
+
+class ChangeLogStore(ABC):
+    """Base for stores that share a Redis hash between worker processes
+
+    Subclasses apply hash values to their local state in ``_apply`` and list
+    their local keys in ``_local_keys``.
+    """
+
+    label = 'shared'
+
+    def __init__(self, redis_client, values_key: str, changes_key: str, max_changes: int = 10000):
+        self.redis = redis_client
+        self.values_key = values_key
+        self.changes_key = changes_key
+        self.max_changes = max_changes
+        # Last stream entry applied locally; None until the first full load
+        self.last_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _apply(self, key: str, value: Optional[bytes]) -> None:
+        """Apply one hash value to local state; None means the key was removed"""
+
+    @abstractmethod
+    def _local_keys(self) -> List[str]:
+        """Keys currently held in local state"""
+
+    def _log_changes(self, pipe, keys: List[str]) -> None:
+        """Queue a change entry for the keys on a pipeline that also updates the hash"""
+        pipe.xadd(self.changes_key, {'keys': json.dumps(keys)},
+                  maxlen=self.max_changes, approximate=True)
+
+    def sync(self) -> None:
+        """Apply changes made by other processes since the last sync"""
+        with self._lock:
+            try:
+                self._replay()
+            except redis.RedisError as e:
+                # Keep serving the local copy until Redis is reachable again
+                print(f"Failed to sync {self.label} changes: {e}")
+
+    def _replay(self) -> None:
+        if self.last_id is None:
+            self._reload()
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xrange(self.changes_key, '-', '+', count=1)
+        pipe.xrange(self.changes_key, f"({self.last_id}", '+', count=self.max_changes)
+        oldest, entries = pipe.execute()
+        if not entries:
+            return
+
+        trimmed = stream_position(decode(oldest[0][0])) > stream_position(self.last_id)
+        if trimmed or len(entries) >= self.max_changes:
+            # Changes we have not seen may have been trimmed away
+            self._reload()
+            return
+
+        keys = list(dict.fromkeys(key for _, fields in entries for key in entry_keys(fields)))
+        for key, value in zip(keys, self.redis.hmget(self.values_key, keys)):
+            self._apply(key, value)
+        self.last_id = decode(entries[-1][0])
+
+    def _reload(self) -> None:
+        """Replace local state with the whole hash"""
+        # Read the stream position first: changes made after it are replayed
+        # on the next sync, and applying them twice is harmless
+        latest = self.redis.xrevrange(self.changes_key, '+', '-', count=1)
+        values: Dict[str, bytes] = {decode(key): value for key, value in self.redis.hgetall(self.values_key).items()}
+
+        for key in self._local_keys():
+            if key not in values:
+                self._apply(key, None)
+        for key, value in values.items():
+            self._apply(key, value)
+
+        self.last_id = decode(latest[0][0]) if latest else '0-0'
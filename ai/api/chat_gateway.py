@@ -0,0 +1,212 @@
+"""
+PropertyConnect WebSocket Chat Gateway
+Serves chat over Socket.IO alongside the Flask API, backed by one shared PropertyChatbot
+
+Run with an eventlet worker so that idle connections only cost a green thread
+(this is the ``ai-chat`` service in docker-compose):
+
+    gunicorn --worker-class eventlet --workers 1 --worker-connections 20000 \\
+        --bind 0.0.0.0:8000 api.chat_gateway:application
+"""
+
+import eventlet
+import eventlet.wsgi
+
+if __name__ == '__main__':
+    # gunicorn's eventlet worker patches before it loads the app; patch here
+    # only when the gateway is run directly
+    eventlet.monkey_patch()
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any
+
+import socketio
+from eventlet import tpool
+
+from api.app import app as flask_app, admission, interaction_log, profiler
+from chatbot.main import PropertyChatbot
+
+# Number of streamed chunks a client may leave unacknowledged before we stop
+# reading from OpenAI for that connection
+STREAM_WINDOW = int(os.getenv('CHAT_STREAM_WINDOW', 32))
+
+# Seconds a slow client gets to acknowledge a chunk before it is disconnected
+STREAM_ACK_TIMEOUT = float(os.getenv('CHAT_STREAM_ACK_TIMEOUT', 10))
+
+# Upper bound on a single inbound message; keeps per-connection buffers small
+MAX_MESSAGE_BYTES = int(os.getenv('CHAT_MAX_MESSAGE_BYTES', 16 * 1024))
+
+sio = socketio.Server(
+    async_mode='eventlet',
+    cors_allowed_origins=os.getenv('CHAT_CORS_ORIGINS', '*').split(','),
+    max_http_buffer_size=MAX_MESSAGE_BYTES,
+    ping_interval=25,
+    ping_timeout=20
+)
+
+# WSGI entry point serving both Socket.IO and the existing Flask routes
+application = socketio.WSGIApp(sio, flask_app)
+
+# Requests here run on green threads, whose ids never match the OS thread stacks
+# the request profiler samples
+profiler.supported = False
+
+# The chatbot only holds read-only intent data; conversation state lives in
+# each connection's session
+chatbot = PropertyChatbot()
+chatbot.interaction_log = interaction_log
+
+# Intent matching is CPU-bound (spaCy parses every pattern), so run it on
+# eventlet's native thread pool instead of blocking the hub for every connection.
+# Match once up front so lazily loaded NLP corpora are not first loaded
+# concurrently from several pool threads.
+chatbot.score_intent('hello')
+chatbot.match_executor = tpool.execute
+
+class StreamWindow:
+    """Flow-control window of one connection: chunks it may leave unacknowledged
+
+    Closing the window on disconnect wakes a stream waiting for acks, so it
+    stops at once instead of waiting out the ack timeout.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.available = size
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take a slot; False if the window closed or no ack arrived in time"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self.closed and self.available == 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            if self.closed:
+                return False
+            self.available -= 1
+            return True
+
+    def release(self) -> None:
+        """Return a slot when the client acks a chunk"""
+        with self._cond:
+            if self.available < self.size:
+                self.available += 1
+                self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+# Flow-control windows of open connections
+stream_windows: Dict[str, StreamWindow] = {}
+
+
+def release_window(sid: str) -> None:
+    """Return one slot to a connection's window when the client acks a chunk"""
+    window = stream_windows.get(sid)
+    if window is not None:
+        window.release()
+
+
+@sio.event
+def connect(sid: str, environ: Dict[str, Any], auth: Any = None) -> None:
+    """Start a chat session for a new connection"""
+    context = dict(auth.get('context', {})) if isinstance(auth, dict) else {}
+    # Same caller identity as the REST API uses for per-user rate limiting
+    user = environ.get('HTTP_X_USER_ID') or environ.get('REMOTE_ADDR') or sid
+    sio.save_session(sid, {'context': context, 'user': user})
+    stream_windows[sid] = StreamWindow(STREAM_WINDOW)
+
+
+@sio.event
+def disconnect(sid: str) -> None:
+    """Drop per-connection state and stop any reply still streaming to it"""
+    window = stream_windows.pop(sid, None)
+    if window is not None:
+        window.close()
+
+
+@sio.on('reset_context')
+def reset_context(sid: str) -> Dict[str, Any]:
+    """Reset the conversation context for a connection"""
+    with sio.session(sid) as session:
+        session['context'] = {}
+    return {'success': True}
+
+
+@sio.on('chat_message')
+def chat_message(sid: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Handle a chat message, pushing the reply as a stream of tokens
+
+    The reply is sent as ``chat_token`` events, each of which the client must
+    acknowledge, followed by a single ``chat_response`` with the full text.
+    """
+    if not isinstance(data, dict) or not str(data.get('message', '')).strip():
+        return {'error': 'No message provided'}
+
+    message = str(data['message'])
+    message_id = data.get('id')
+    use_ai = bool(data.get('use_ai', False))
+
+    window = stream_windows.get(sid)
+    if window is None or window.closed:
+        return {'error': 'Not connected'}
+
+    with sio.session(sid) as session:
+        context = session['context']
+        user = session['user']
+
+    parts = []
+
+    # OpenAI calls share the worker's admission controller with the REST routes
+    reply = chatbot.stream_message(message, use_ai, context, admit=lambda: admission.admit(user, 'high'))
+
+    try:
+        while True:
+            # Take a window slot before reading the next chunk, so nothing more
+            # is read for a client that is slow or gone
+            if not window.acquire(timeout=STREAM_ACK_TIMEOUT):
+                if window.closed:
+                    return {'error': 'Client disconnected'}
+                # Client stopped draining its socket; free the connection rather
+                # than buffering an unbounded reply for it
+                sio.disconnect(sid)
+                return {'error': 'Client too slow'}
+
+            token = next(reply, None)
+            if token is None:
+                window.release()
+                break
+
+            sio.emit('chat_token', {'id': message_id, 'seq': len(parts), 'token': token},
+                     to=sid, callback=lambda *args: release_window(sid))
+            parts.append(token)
+    finally:
+        # Stop reading from OpenAI as soon as the stream is abandoned
+        reply.close()
+
+    with sio.session(sid) as session:
+        session['context'] = context
+
+    sio.emit('chat_response', {
+        'id': message_id,
+        'response': ''.join(parts),
+        'intent': context.get('last_intent'),
+        'timestamp': datetime.utcnow().isoformat()
+    }, to=sid)
+
+    return {'success': True}
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 8000))
+    eventlet.wsgi.server(eventlet.listen(('0.0.0.0', port)), application)
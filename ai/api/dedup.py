@@ -0,0 +1,299 @@
+"""
+PropertyConnect Near-Duplicate Listing Detection
+MinHash signatures with LSH banding over listing text and key attributes
+
+Agents often re-list the same property with a lightly edited description. The
+index finds such near-duplicates so their existing analysis can be reused
+instead of generating a new one. Similar text alone is not enough: a match only
+counts as the same property when its identifying attributes (bedrooms,
+bathrooms, type, region, street address) are equal and its price is close, and
+listings with too little text to compare are never matched.
+"""
+
+import math
+import re
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Any, Callable, Optional, Set, Tuple
+
+import numpy as np
+import redis
+
+from api.changelog import ChangeLogStore, decode
+
+# Prime just above 2**32 for the universal hash family
+MERSENNE_PRIME = np.uint64(4294967311)
+
+# Word shingle size for listing text
+SHINGLE_SIZE = 3
+
+# Listings with fewer text shingles are never matched: their signatures are
+# dominated by the handful of coarse attribute tokens
+MIN_TEXT_SHINGLES = 8
+
+# Largest relative price difference between listings of the same property
+PRICE_TOLERANCE = 0.1
+
+# Street address spellings normalized before comparison
+STREET_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'drive': 'dr', 'boulevard': 'blvd',
+    'lane': 'ln', 'court': 'ct', 'place': 'pl', 'terrace': 'ter', 'highway': 'hwy',
+    'parkway': 'pkwy', 'circle': 'cir', 'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+    'apartment': 'apt', 'unit': 'apt', 'suite': 'ste'
+}
+
+
+def text_shingles(listing: Dict[str, Any]) -> Set[str]:
+    """Word shingles of the listing title, description and address"""
+    text = ' '.join(str(listing.get(field) or '') for field in ('title', 'description', 'address'))
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    if not words:
+        return set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+
+
+def normalize_street(address: Any) -> str:
+    """Street part of an address (before the first comma) in a canonical spelling"""
+    street = str(address or '').split(',')[0].lower()
+    return ' '.join(STREET_ABBREVIATIONS.get(word, word) for word in re.findall(r'[a-z0-9]+', street))
+
+
+def listing_shingles(listing: Dict[str, Any], region_id: Optional[str] = None) -> Set[str]:
+    """Word shingles of the listing text plus coarse attribute tokens"""
+    shingles = text_shingles(listing)
+
+    # Bucket numeric attributes so small edits (e.g. a price drop) still collide
+    shingles.add(f"type:{str(listing.get('type', '')).lower()}")
+    for field in ('bedrooms', 'bathrooms'):
+        shingles.add(f"{field}:{listing.get(field)}")
+    for field in ('price', 'area'):
+        value = float(listing.get(field) or 0)
+        shingles.add(f"{field}:{int(math.log(value, 1.1)) if value > 0 else 0}")
+    if region_id:
+        shingles.add(f"region:{region_id}")
+
+    return shingles
+
+
+class NearDuplicateIndex:
+    """Incremental MinHash/LSH index of listings"""
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, threshold: float = 0.7, seed: int = 42,
+                 location_resolver=None):
+        if num_perm % bands:
+            raise ValueError('num_perm must be divisible by bands')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.location_resolver = location_resolver
+
+        rng = np.random.RandomState(seed)
+        # a < 2**31 and x < 2**32 keep a * x + b within uint64
+        self.a = rng.randint(1, 2 ** 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: List[Dict[bytes, Set[str]]] = [defaultdict(set) for _ in range(bands)]
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def region(self, listing: Dict[str, Any]) -> Optional[str]:
+        """Region id of a listing, or its normalized city when it does not resolve"""
+        location = listing.get('city') or listing.get('address') or ''
+        region_id = self.location_resolver.region_id(location) if self.location_resolver and location else None
+        return region_id or (str(listing['city']).strip().lower() if listing.get('city') else None)
+
+    def signature(self, listing: Dict[str, Any]) -> np.ndarray:
+        """MinHash signature of a listing"""
+        hashes = np.array(
+            [zlib.crc32(shingle.encode('utf-8')) for shingle in listing_shingles(listing, self.region(listing))],
+            dtype=np.uint64
+        )
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    @staticmethod
+    def comparable(listing: Dict[str, Any]) -> bool:
+        """Whether a listing has enough text to be matched against others"""
+        return len(text_shingles(listing)) >= MIN_TEXT_SHINGLES
+
+    def identity(self, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """Attributes that must agree for two listings to be the same property"""
+        def number(value):
+            try:
+                return float(value) if value not in (None, '') else None
+            except (TypeError, ValueError):
+                return None
+
+        return {
+            'bedrooms': number(listing.get('bedrooms')),
+            'bathrooms': number(listing.get('bathrooms')),
+            'type': str(listing.get('type') or '').strip().lower(),
+            'region': self.region(listing),
+            'street': normalize_street(listing.get('address')),
+            'price': number(listing.get('price'))
+        }
+
+    @staticmethod
+    def same_property(identity: Dict[str, Any], other: Optional[Dict[str, Any]],
+                      price_tolerance: float = PRICE_TOLERANCE) -> bool:
+        """Whether two listing identities describe the same property"""
+        if not other or not identity['street']:
+            return False
+        if any(identity[field] != other.get(field) for field in ('bedrooms', 'bathrooms', 'type', 'region', 'street')):
+            return False
+        price, other_price = identity['price'], other.get('price')
+        if not price or not other_price:
+            return False
+        return abs(price - other_price) / max(price, other_price) <= price_tolerance
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, listing_id: str, signature: np.ndarray) -> None:
+        """Insert or replace a listing's signature"""
+        listing_id = str(listing_id)
+        with self._lock:
+            self.remove(listing_id)
+            self.signatures[listing_id] = signature
+            for band, key in zip(self.buckets, self._band_keys(signature)):
+                band[key].add(listing_id)
+
+    def remove(self, listing_id: str) -> bool:
+        """Remove a listing from the index"""
+        listing_id = str(listing_id)
+        with self._lock:
+            signature = self.signatures.pop(listing_id, None)
+            if signature is None:
+                return False
+            for band, key in zip(self.buckets, self._band_keys(signature)):
+                band[key].discard(listing_id)
+                if not band[key]:
+                    del band[key]
+            return True
+
+    def query(self, signature: np.ndarray, threshold: Optional[float] = None,
+              accept: Optional[Callable[[str], bool]] = None) -> Optional[Tuple[str, float]]:
+        """Most similar indexed listing at or above the threshold, with its estimated Jaccard similarity
+
+        ``accept`` optionally rules out candidates by listing id.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            candidates: Set[str] = set()
+            for band, key in zip(self.buckets, self._band_keys(signature)):
+                candidates.update(band.get(key, ()))
+
+            best: Optional[Tuple[str, float]] = None
+            for candidate in candidates:
+                similarity = float(np.mean(self.signatures[candidate] == signature))
+                if similarity < threshold or (accept is not None and not accept(candidate)):
+                    continue
+                if best is None or similarity > best[1]:
+                    best = (candidate, similarity)
+            return best
+
+    def dedupe(self, listings: List[Dict[str, Any]], threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Group a whole catalog into near-duplicate clusters in one pass
+
+        Each listing joins the cluster of the first earlier listing it matches
+        that is the same property; only clusters with duplicates are returned.
+        The index itself is not modified.
+        """
+        batch = NearDuplicateIndex(self.num_perm, self.bands, self.threshold, location_resolver=self.location_resolver)
+        batch.a, batch.b = self.a, self.b
+        clusters: Dict[str, List[Dict[str, Any]]] = {}
+        identities: Dict[str, Dict[str, Any]] = {}
+
+        for listing in listings:
+            listing_id = str(listing['id'])
+            if not self.comparable(listing):
+                continue
+            identity = identities[listing_id] = self.identity(listing)
+            signature = batch.signature(listing)
+            match = batch.query(signature, threshold,
+                                accept=lambda candidate: self.same_property(identity, identities[candidate]))
+            if match:
+                clusters[match[0]].append({'property_id': listing_id, 'similarity': round(match[1], 4)})
+            else:
+                clusters[listing_id] = []
+                batch.add(listing_id, signature)
+
+        return [
+            {'canonical_id': canonical, 'duplicates': duplicates}
+            for canonical, duplicates in clusters.items() if duplicates
+        ]
+
+
+class SignatureStore(ChangeLogStore):
+    """Shares indexed signatures between worker processes through Redis
+
+    Works like the recommendation CatalogStore: signatures live in a Redis hash
+    and a capped change stream lets each process replay only what it has not seen.
+    A signature is only useful while the analysis it points to is cached, so
+    each one expires after ``ttl`` seconds, tracked in a sorted set by expiry time.
+    """
+
+    label = 'signature'
+
+    def __init__(self, redis_client, index: NearDuplicateIndex, namespace: str = 'listing_signatures',
+                 max_changes: int = 10000, ttl: float = 3600):
+        super().__init__(redis_client, f"{namespace}:signatures", f"{namespace}:stream", max_changes)
+        self.expiry_key = f"{namespace}:expiry"
+        self.ttl = ttl
+        self.index = index
+        # Expiry times of signatures only indexed here because Redis was unavailable
+        self.local_expiry: Dict[str, float] = {}
+
+    def _apply(self, key: str, value: Optional[bytes]) -> None:
+        if value:
+            self.index.add(key, np.frombuffer(value, dtype=np.uint64))
+        else:
+            self.index.remove(key)
+
+    def _local_keys(self) -> List[str]:
+        return list(self.index.signatures)
+
+    def add(self, listing_id: str, signature: np.ndarray) -> None:
+        """Index a listing for every process; falls back to this process only if Redis fails"""
+        listing_id = str(listing_id)
+        now = time.time()
+        try:
+            self.expire(now)
+            pipe = self.redis.pipeline()
+            pipe.hset(self.values_key, listing_id, signature.tobytes())
+            pipe.zadd(self.expiry_key, {listing_id: now + self.ttl})
+            self._log_changes(pipe, [listing_id])
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Failed to share listing signature: {e}")
+            self._expire_local(now)
+            self.local_expiry[listing_id] = now + self.ttl
+            self.index.add(listing_id, signature)
+            return
+        self.sync()
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Remove expired signatures for every process; returns the removed listing ids"""
+        now = time.time() if now is None else now
+        self._expire_local(now)
+        expired = [decode(member) for member in self.redis.zrangebyscore(self.expiry_key, '-inf', now)]
+        if not expired:
+            return []
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.expiry_key, *expired)
+        pipe.hdel(self.values_key, *expired)
+        self._log_changes(pipe, expired)
+        pipe.execute()
+        self.sync()
+        return expired
+
+    def _expire_local(self, now: float) -> None:
+        for listing_id, expires in list(self.local_expiry.items()):
+            if expires <= now:
+                del self.local_expiry[listing_id]
+                self.index.remove(listing_id)
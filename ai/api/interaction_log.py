@@ -0,0 +1,150 @@
+"""
+PropertyConnect Interaction Log
+Non-blocking, buffered log of chat turns and analysis requests
+
+Request threads only enqueue records; a background thread writes them in batches
+to append-only, gzip-compressed JSON Lines files that are rotated by size and age.
+When the writer falls behind, new records are dropped and counted instead of
+growing memory without bound.
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional
+
+
+class InteractionLogger:
+    """Buffered writer of interaction records"""
+
+    def __init__(self, directory: str, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, rotate_bytes: int = 64 * 1024 * 1024,
+                 rotate_seconds: float = 3600.0):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+
+        self.written = 0
+        self.dropped = 0
+
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._file = None
+        self._file_path: Optional[str] = None
+        self._file_opened = 0.0
+        # Distinguishes files this process opens within the same second
+        self._file_sequence = 0
+        self._writer = threading.Thread(target=self._run, name='interaction-log-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def log(self, record: Dict[str, Any]) -> bool:
+        """Enqueue a record without blocking; returns False if it was dropped"""
+        record.setdefault('timestamp', datetime.utcnow().isoformat())
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        """Wait up to the flush interval for a record, then take whatever else is queued"""
+        batch: List[Dict[str, Any]] = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _current_file(self):
+        """Open file for appending, rotating it when it is too large or too old"""
+        if self._file is not None:
+            too_big = self._file.tell() >= self.rotate_bytes
+            too_old = time.monotonic() - self._file_opened >= self.rotate_seconds
+            if too_big or too_old:
+                self._file.close()
+                self._file = None
+
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file_sequence += 1
+            name = (f"interactions-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+                    f"-{self._file_sequence:06d}.jsonl.gz")
+            self._file_path = os.path.join(self.directory, name)
+            self._file = open(self._file_path, 'ab')
+            self._file_opened = time.monotonic()
+
+        return self._file
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = ''.join(json.dumps(record, separators=(',', ':'), default=str) + '\n' for record in batch)
+        # Each batch is one complete gzip member, so readers never see a torn record
+        data = gzip.compress(lines.encode('utf-8'))
+        file = self._current_file()
+        file.write(data)
+        file.flush()
+        self.written += len(batch)
+
+    def _run(self) -> None:
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._drain()
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            except OSError as e:
+                self.dropped += len(batch)
+                print(f"Failed to write interaction log batch: {e}")
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        """Flush queued records and stop the writer"""
+        if not self._stop.is_set():
+            self._stop.set()
+            self._writer.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'current_file': self._file_path
+        }
+
+
+def read_interactions(directory: str, kinds: Optional[List[str]] = None,
+                      since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream logged records back, oldest file first
+
+    ``kinds`` filters on the record kind and ``since`` on its ISO timestamp.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, 'interactions-*.jsonl.gz'))):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    record = json.loads(line)
+                    if kinds and record.get('kind') not in kinds:
+                        continue
+                    if since and record.get('timestamp', '') < since:
+                        continue
+                    yield record
+        except EOFError:
+            # File still being written by another process; its last member is incomplete
+            continue
@@ -0,0 +1,299 @@
+"""
+PropertyConnect AI Job Queue
+Redis-backed priority queue for long-running AI analyses, processed by background workers
+
+Jobs are deduplicated by kind and payload, so enqueueing the same analysis twice
+returns the existing job. Running jobs hold a lease that their worker renews; jobs
+whose worker died are requeued once the lease expires. Start a worker pool with:
+
+    python -m api.jobs
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import redis
+import requests
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+
+# Sorted-set scores are priority * PRIORITY_STRIDE + enqueue time in ms, so
+# jobs run by priority first and FIFO within a priority
+PRIORITY_STRIDE = 10 ** 13
+
+# Schemes allowed for job callbacks
+CALLBACK_SCHEMES = {'http', 'https'}
+
+
+class JobQueue:
+    """Priority job queue with Redis-stored state and results"""
+
+    def __init__(self, redis_client: redis.Redis, namespace: str = 'ai_jobs', result_ttl: int = 3600,
+                 lease_seconds: float = 60.0, max_attempts: int = 3,
+                 callback_hosts: Optional[Iterable[str]] = None, blocking_client: Optional[redis.Redis] = None):
+        self.redis = redis_client
+        # Workers block on the queue, which needs a socket timeout longer than
+        # the pop; everything else uses the regular fail-fast client
+        self.blocking_redis = blocking_client or redis_client
+        self.namespace = namespace
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Hosts job callbacks may be sent to; ".example.com" also allows subdomains.
+        # Callbacks are rejected when no hosts are configured.
+        self.callback_hosts = {host.strip().lower() for host in callback_hosts or () if host.strip()}
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._running = threading.local()
+        # Sends callbacks for jobs that finish outside a worker, e.g. when a
+        # request finds its job already done, so the request never waits on them
+        self._notifier = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ai-job-callback')
+
+    def _key(self, *parts: str) -> str:
+        return ':'.join((self.namespace,) + parts)
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any]], Dict[str, Any]]) -> None:
+        """Register the function that processes jobs of the given kind"""
+        self.handlers[kind] = handler
+
+    def current_job_id(self) -> Optional[str]:
+        """Id of the job the calling worker thread is running, if any"""
+        return getattr(self._running, 'job_id', None)
+
+    def job_id(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Derive a stable job id so identical jobs share one id"""
+        body = json.dumps({'kind': kind, 'payload': payload}, sort_keys=True, default=str)
+        return hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]
+
+    def callback_allowed(self, url: str) -> bool:
+        """Whether a callback URL points at an allow-listed host"""
+        try:
+            parsed = urlparse(url)
+            host = (parsed.hostname or '').lower()
+        except ValueError:
+            return False
+        if parsed.scheme not in CALLBACK_SCHEMES or not host:
+            return False
+        return any(
+            host == allowed or (allowed.startswith('.') and host.endswith(allowed))
+            for allowed in self.callback_hosts
+        )
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], priority: str = 'normal',
+                callback_url: Optional[str] = None) -> Dict[str, Any]:
+        """Enqueue a job, or return the existing job if an identical one is queued, running or done"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if callback_url and not self.callback_allowed(callback_url):
+            raise ValueError('Callback URL host is not allowed')
+
+        job_id = self.job_id(kind, payload)
+        job_key = self._key('job', job_id)
+
+        if callback_url:
+            callbacks_key = self._key('callbacks', job_id)
+            self.redis.sadd(callbacks_key, callback_url)
+            self.redis.expire(callbacks_key, self.result_ttl)
+
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'payload': payload,
+            'priority': priority,
+            'status': 'queued',
+            'created_at': datetime.utcnow().isoformat()
+        }
+
+        if not self.redis.set(job_key, json.dumps(job), nx=True, ex=self.result_ttl):
+            if self.requeue_stale(job_id):
+                return self.get(job_id) or job
+            existing = self.get(job_id)
+            if existing and existing['status'] != 'failed':
+                if existing['status'] == 'done' and callback_url:
+                    self._notify_later(existing)
+                return existing
+            # Previous attempt failed; retry it
+            self.redis.set(job_key, json.dumps(job), ex=self.result_ttl)
+
+        self._push(job_id, priority)
+        return job
+
+    def _push(self, job_id: str, priority: str) -> None:
+        score = PRIORITIES[priority] * PRIORITY_STRIDE + int(time.time() * 1000)
+        self.redis.zadd(self._key('queue'), {job_id: score}, nx=True)
+
+    def requeue_stale(self, job_id: Optional[str] = None) -> int:
+        """Requeue running jobs whose lease expired because their worker died
+
+        Checks only ``job_id`` when given, otherwise every running job. A job
+        that has already been attempted ``max_attempts`` times is failed instead.
+        """
+        running_key = self._key('running')
+        now = time.time()
+        if job_id is None:
+            stale = self.redis.zrangebyscore(running_key, '-inf', now)
+        else:
+            lease = self.redis.zscore(running_key, job_id)
+            stale = [job_id] if lease is not None and lease <= now else []
+
+        requeued = 0
+        for stale_id in stale:
+            stale_id = stale_id.decode('utf-8') if isinstance(stale_id, bytes) else stale_id
+            # Only the process that removes the lease requeues the job
+            if not self.redis.zrem(running_key, stale_id):
+                continue
+            job = self.get(stale_id)
+            if job is None or job['status'] != 'running':
+                continue
+
+            if job.get('attempts', 0) >= self.max_attempts:
+                job['status'] = 'failed'
+                job['error'] = 'Worker stopped responding'
+                job['finished_at'] = datetime.utcnow().isoformat()
+                self._save(job)
+                self._notify_later(job)
+                continue
+
+            job['status'] = 'queued'
+            self._save(job)
+            self._push(stale_id, job['priority'])
+            requeued += 1
+        return requeued
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job's current state and, once done, its result"""
+        data = self.redis.get(self._key('job', job_id))
+        return json.loads(data) if data else None
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        self.redis.set(self._key('job', job['id']), json.dumps(job), ex=self.result_ttl)
+
+    def _notify(self, job: Dict[str, Any]) -> None:
+        """POST a finished job to every callback registered for it"""
+        callbacks_key = self._key('callbacks', job['id'])
+        for url in self.redis.smembers(callbacks_key):
+            url = url.decode('utf-8') if isinstance(url, bytes) else url
+            if not self.callback_allowed(url):
+                print(f"Skipping job callback to disallowed URL {url}")
+                continue
+            try:
+                # Redirects are not followed so a callback cannot be bounced to another host
+                requests.post(url, json={'success': job['status'] == 'done', 'data': job},
+                              timeout=5, allow_redirects=False)
+            except requests.RequestException as e:
+                print(f"Job callback to {url} failed: {e}")
+        self.redis.delete(callbacks_key)
+
+    def _notify_later(self, job: Dict[str, Any]) -> None:
+        """Send a job's callbacks on a background thread"""
+        def notify():
+            try:
+                self._notify(job)
+            except redis.RedisError as e:
+                print(f"Failed to send job callbacks: {e}")
+        self._notifier.submit(notify)
+
+    def _renew_lease(self, job_id: str, done: threading.Event) -> None:
+        """Heartbeat: keep extending a running job's lease until it finishes"""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                # xx: never resurrect a lease that was already reclaimed
+                self.redis.zadd(self._key('running'), {job_id: time.time() + self.lease_seconds}, xx=True)
+            except redis.RedisError as e:
+                print(f"Failed to renew job lease: {e}")
+
+    def process_next(self, timeout: int = 5) -> Optional[Dict[str, Any]]:
+        """Pop the highest-priority job and run it; returns None if the queue stayed empty"""
+        self.requeue_stale()
+
+        popped = self.blocking_redis.bzpopmin(self._key('queue'), timeout=timeout)
+        if not popped:
+            return None
+
+        job_id = popped[1].decode('utf-8') if isinstance(popped[1], bytes) else popped[1]
+        self.redis.zadd(self._key('running'), {job_id: time.time() + self.lease_seconds})
+        job = self.get(job_id)
+        if job is None:
+            # Expired before a worker got to it
+            self.redis.zrem(self._key('running'), job_id)
+            return None
+
+        job['status'] = 'running'
+        job['attempts'] = job.get('attempts', 0) + 1
+        job['started_at'] = datetime.utcnow().isoformat()
+        self._save(job)
+
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._renew_lease, args=(job_id, done),
+                                     name=f"ai-job-lease-{job_id[:8]}", daemon=True)
+        heartbeat.start()
+        self._running.job_id = job_id
+        try:
+            job['result'] = self.handlers[job['kind']](job['payload'])
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            self._running.job_id = None
+            done.set()
+            heartbeat.join()
+
+        job['finished_at'] = datetime.utcnow().isoformat()
+        self._save(job)
+        self.redis.zrem(self._key('running'), job_id)
+        self._notify(job)
+        return job
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.process_next()
+            except redis.RedisError as e:
+                print(f"Job worker Redis error: {e}")
+                time.sleep(1)
+
+    def start_workers(self, count: int) -> None:
+        """Start background worker threads"""
+        self._stop.clear()
+        for i in range(count):
+            worker = threading.Thread(target=self._work, name=f"ai-job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop_workers(self) -> None:
+        """Signal workers to stop once their current job finishes"""
+        self._stop.set()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+
+def main():
+    """Run a pool of job workers for the AI service"""
+    from api.app import job_queue
+
+    count = int(os.getenv('AI_JOB_WORKERS', 4))
+    job_queue.start_workers(count)
+    print(f"Started {count} AI job workers")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping AI job workers...")
+        job_queue.stop_workers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+PropertyConnect Location Resolver
+Maps free-text locations to stable region ids using a local gazetteer
+
+"Austin, TX", "austin tx" and "Downtown Austin" all resolve to ``us-tx-austin``,
+so caches and aggregates keyed on region ids are shared between spellings.
+Exact names and aliases are dictionary lookups. Anything else falls back to
+fuzzy matching that only forgives typos: candidates come from a character
+trigram index and must be within one or two edits of a known name with the same
+number of words. Unresolved locations return None rather than a guess, since
+callers key caches and features on the region id.
+
+Each region is a single municipality: aliases only cover other spellings and
+neighbourhoods of the same city, and suburbs are regions of their own. Regions
+whose name is shared with places in other states (e.g. "Arlington") set
+``requires_state`` and only resolve when the location names their state.
+"""
+
+import json
+import os
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.json')
+
+STATES = {
+    'al': 'alabama', 'ak': 'alaska', 'az': 'arizona', 'ar': 'arkansas', 'ca': 'california',
+    'co': 'colorado', 'ct': 'connecticut', 'de': 'delaware', 'dc': 'district of columbia',
+    'fl': 'florida', 'ga': 'georgia', 'hi': 'hawaii', 'id': 'idaho', 'il': 'illinois',
+    'in': 'indiana', 'ia': 'iowa', 'ks': 'kansas', 'ky': 'kentucky', 'la': 'louisiana',
+    'me': 'maine', 'md': 'maryland', 'ma': 'massachusetts', 'mi': 'michigan', 'mn': 'minnesota',
+    'ms': 'mississippi', 'mo': 'missouri', 'mt': 'montana', 'ne': 'nebraska', 'nv': 'nevada',
+    'nh': 'new hampshire', 'nj': 'new jersey', 'nm': 'new mexico', 'ny': 'new york',
+    'nc': 'north carolina', 'nd': 'north dakota', 'oh': 'ohio', 'ok': 'oklahoma', 'or': 'oregon',
+    'pa': 'pennsylvania', 'ri': 'rhode island', 'sc': 'south carolina', 'sd': 'south dakota',
+    'tn': 'tennessee', 'tx': 'texas', 'ut': 'utah', 'vt': 'vermont', 'va': 'virginia',
+    'wa': 'washington', 'wv': 'west virginia', 'wi': 'wisconsin', 'wy': 'wyoming'
+}
+STATE_CODES = {name: code for code, name in STATES.items()}
+
+# Words that qualify a place without changing which region it is in
+QUALIFIERS = {'downtown', 'greater', 'metro', 'area', 'city', 'of', 'the', 'central', 'usa', 'us'}
+
+# Minimum trigram similarity for a name to be checked as a fuzzy match
+FUZZY_CANDIDATE_THRESHOLD = 0.4
+
+# Shorter locations are only matched exactly; from FUZZY_TWO_EDIT_LENGTH
+# characters two typos are forgiven instead of one
+FUZZY_MIN_LENGTH = 7
+FUZZY_TWO_EDIT_LENGTH = 11
+
+# Minimum ratio of the shorter to the longer of location and name
+FUZZY_LENGTH_RATIO = 0.8
+
+
+def normalize_location(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = text.lower().replace('.', '').replace("'", '')
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a padded string"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance: insertions, deletions, substitutions and adjacent transpositions"""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[len(b)]
+
+
+class LocationResolver:
+    """Resolves free-text locations to gazetteer regions"""
+
+    def __init__(self, gazetteer_path: str = DEFAULT_GAZETTEER):
+        with open(gazetteer_path, 'r', encoding='utf-8') as file:
+            self.regions: Dict[str, Dict[str, Any]] = {
+                region['id']: region for region in json.load(file)['regions']
+            }
+
+        # Normalized name or alias -> region ids, in gazetteer order
+        self.names: Dict[str, List[str]] = defaultdict(list)
+        for region_id, region in self.regions.items():
+            for name in [region['name']] + region.get('aliases', []):
+                key = normalize_location(name)
+                if region_id not in self.names[key]:
+                    self.names[key].append(region_id)
+
+        self.index: Dict[str, Set[str]] = defaultdict(set)
+        self.gram_counts: Dict[str, int] = {}
+        for name in self.names:
+            grams = trigrams(name)
+            self.gram_counts[name] = len(grams)
+            for gram in grams:
+                self.index[gram].add(name)
+
+        self.resolve = lru_cache(maxsize=65536)(self._resolve)
+
+    def _pick(self, names: List[str], state: Optional[str]) -> Optional[str]:
+        """First region for the names in the given state, if any"""
+        for name in names:
+            for region_id in self.names.get(name, []):
+                region = self.regions[region_id]
+                if state is None and not region.get('requires_state'):
+                    return region_id
+                if state is not None and region['state'].lower() == state:
+                    return region_id
+        return None
+
+    def _fuzzy(self, text: str, state: Optional[str]) -> Optional[str]:
+        """Region for a typo-level misspelling of one known name, or None when unsure"""
+        if len(text) < FUZZY_MIN_LENGTH:
+            return None
+        allowed = 2 if len(text) >= FUZZY_TWO_EDIT_LENGTH else 1
+        words = len(text.split())
+
+        grams = trigrams(text)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for name in self.index.get(gram, ()):
+                overlap[name] += 1
+
+        matches: Dict[int, List[str]] = defaultdict(list)
+        for name, count in overlap.items():
+            if 2 * count / (len(grams) + self.gram_counts[name]) < FUZZY_CANDIDATE_THRESHOLD:
+                continue
+            # Extra or missing words mean a different place, e.g. "Dallas Center"
+            if len(name.split()) != words:
+                continue
+            if min(len(name), len(text)) / max(len(name), len(text)) < FUZZY_LENGTH_RATIO:
+                continue
+            distance = edit_distance(text, name)
+            if distance <= allowed:
+                matches[distance].append(name)
+
+        if not matches:
+            return None
+        closest = matches[min(matches)]
+        # Equally close to two different names: ambiguous
+        return self._pick(closest, state) if len(closest) == 1 else None
+
+    def _split_state(self, text: str) -> Tuple[str, Optional[str]]:
+        """Split a trailing state code or name off a location"""
+        words = text.split()
+        for size in (3, 2, 1):
+            if len(words) > size:
+                tail = ' '.join(words[-size:])
+                if tail in STATES or tail in STATE_CODES:
+                    return ' '.join(words[:-size]), STATE_CODES.get(tail, tail)
+        return text, None
+
+    def _resolve(self, location: str) -> Optional[Dict[str, Any]]:
+        text = normalize_location(location)
+        if not text:
+            return None
+
+        region_id = self._pick([text], None)
+        if region_id is None:
+            # Drop a trailing ZIP code, then any state qualifier
+            place, state = self._split_state(re.sub(r'( \d{5})+$', '', text))
+            stripped = ' '.join(word for word in place.split() if word not in QUALIFIERS) or place
+            # Street addresses: try comma-separated parts from the most general one
+            parts = [normalize_location(part) for part in location.split(',')[1:]]
+            region_id = self._pick([place, stripped] + parts[::-1], state) or self._fuzzy(stripped, state)
+
+        if region_id is None:
+            return None
+
+        region = self.regions[region_id]
+        return {
+            'id': region_id,
+            'name': f"{region['name']}, {region['state']}",
+            'state': region['state']
+        }
+
+    def region_id(self, location: str) -> Optional[str]:
+        """Region id for a location, or None when it cannot be resolved"""
+        region = self.resolve(location)
+        return region['id'] if region else None
+
+
+# Shared resolver instance
+location_resolver = LocationResolver()
@@ -0,0 +1,201 @@
+"""
+PropertyConnect Request Profiler
+Low-overhead sampling profiler for slow or randomly selected requests
+
+A single background thread periodically samples the stacks of threads that are
+serving profiled requests. Finished profiles are kept in a bounded ring buffer in
+Redis so every worker shares the same configuration and profiles, which can be
+exported in collapsed-stack format for flame graph tools.
+
+Requests are matched to stacks by OS thread id, so processes that serve requests
+on green threads (the eventlet chat gateway) turn the profiler off with
+``supported = False`` rather than record empty profiles.
+"""
+
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import redis
+
+DEFAULT_CONFIG = {
+    'enabled': False,
+    'sample_rate': 0.01,
+    'slow_threshold_ms': 0.0,
+    'interval_ms': 5.0
+}
+
+# Seconds between reloads of the shared configuration in each worker
+CONFIG_REFRESH_SECONDS = 5.0
+
+# Deepest stack recorded per sample
+MAX_STACK_DEPTH = 64
+
+
+def frame_label(frame) -> str:
+    """Short ``package/module.py:function`` label for a stack frame"""
+    filename = frame.f_code.co_filename.replace('\\', '/')
+    if 'site-packages/' in filename:
+        filename = filename.split('site-packages/')[-1]
+    else:
+        filename = '/'.join(filename.split('/')[-2:])
+    return f"{filename}:{frame.f_code.co_name}"
+
+
+class RequestProfile:
+    """Stack samples collected while one request was running"""
+
+    def __init__(self, method: str, path: str, sampled: bool):
+        self.method = method
+        self.path = path
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.stacks: Counter = Counter()
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads serving profiled requests"""
+
+    def __init__(self, redis_client: redis.Redis, namespace: str = 'profiler', max_profiles: int = 200):
+        self.redis = redis_client
+        self.config_key = f"{namespace}:config"
+        self.profiles_key = f"{namespace}:profiles"
+        self.max_profiles = max_profiles
+        self.config: Dict[str, Any] = dict(DEFAULT_CONFIG)
+        # False where requests do not run on their own OS thread
+        self.supported = True
+        self._config_loaded = 0.0
+        self._active: Dict[int, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def refresh_config(self, force: bool = False) -> Dict[str, Any]:
+        """Reload the shared configuration if it is stale"""
+        now = time.monotonic()
+        if not force and now - self._config_loaded < CONFIG_REFRESH_SECONDS:
+            return self.config
+        self._config_loaded = now
+        try:
+            stored = self.redis.get(self.config_key)
+        except redis.RedisError:
+            return self.config
+        self.config = dict(DEFAULT_CONFIG, **(json.loads(stored) if stored else {}))
+        return self.config
+
+    def configure(self, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Update the configuration for every worker"""
+        config = dict(self.refresh_config(force=True))
+        for key, value in updates.items():
+            if key not in DEFAULT_CONFIG:
+                raise ValueError(f"Unknown profiler setting: {key}")
+            if key == 'enabled':
+                if not isinstance(value, bool):
+                    raise ValueError('enabled must be true or false')
+                config[key] = value
+            elif isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"{key} must be a number")
+            else:
+                config[key] = float(value)
+        if not 0.0 <= config['sample_rate'] <= 1.0:
+            raise ValueError('sample_rate must be between 0 and 1')
+        if config['interval_ms'] < 1.0:
+            raise ValueError('interval_ms must be at least 1')
+
+        self.redis.set(self.config_key, json.dumps(config))
+        self.config = config
+        self._config_loaded = time.monotonic()
+        return config
+
+    def start(self, method: str, path: str) -> Optional[RequestProfile]:
+        """Begin profiling the current request if it is selected"""
+        if not self.supported:
+            return None
+        config = self.refresh_config()
+        if not config['enabled']:
+            return None
+
+        sampled = random.random() < config['sample_rate']
+        if not sampled and config['slow_threshold_ms'] <= 0:
+            return None
+
+        profile = RequestProfile(method, path, sampled)
+        with self._lock:
+            self._active[threading.get_ident()] = profile
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+                self._sampler.start()
+            self._wakeup.set()
+        return profile
+
+    def stop(self, profile: Optional[RequestProfile]) -> None:
+        """Finish profiling and keep the profile if it was sampled or slow"""
+        if profile is None:
+            return
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+        duration_ms = (time.perf_counter() - profile.started) * 1000
+        threshold = self.config['slow_threshold_ms']
+        if not (profile.sampled or (threshold > 0 and duration_ms >= threshold)):
+            return
+
+        record = json.dumps({
+            'method': profile.method,
+            'path': profile.path,
+            'duration_ms': round(duration_ms, 2),
+            'reason': 'sampled' if profile.sampled else 'slow',
+            'timestamp': datetime.utcnow().isoformat(),
+            'stacks': dict(profile.stacks)
+        })
+        try:
+            pipe = self.redis.pipeline()
+            pipe.lpush(self.profiles_key, record)
+            pipe.ltrim(self.profiles_key, 0, self.max_profiles - 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Failed to store request profile: {e}")
+
+    def _sample_loop(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+            self._wakeup.wait()
+            time.sleep(self.config['interval_ms'] / 1000)
+
+            frames = sys._current_frames()
+            # Hold the lock for the whole pass so a request cannot finish while
+            # its profile is being updated
+            with self._lock:
+                for thread_id, profile in self._active.items():
+                    frame = frames.get(thread_id)
+                    stack = []
+                    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                        stack.append(frame_label(frame))
+                        frame = frame.f_back
+                    if stack:
+                        profile.stacks[';'.join(reversed(stack))] += 1
+
+    def profiles(self, limit: Optional[int] = None) -> list:
+        """Most recent stored profiles, newest first"""
+        end = (limit or self.max_profiles) - 1
+        return [json.loads(record) for record in self.redis.lrange(self.profiles_key, 0, end)]
+
+    def collapsed(self, path: Optional[str] = None) -> str:
+        """Aggregate stored profiles into collapsed-stack (flame graph) lines"""
+        totals: Counter = Counter()
+        for profile in self.profiles():
+            if path is None or profile['path'] == path:
+                totals.update(profile['stacks'])
+        return '\n'.join(f"{stack} {count}" for stack, count in totals.most_common())
+
+    def clear(self) -> None:
+        """Drop all stored profiles"""
+        self.redis.delete(self.profiles_key)
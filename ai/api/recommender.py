@@ -0,0 +1,248 @@
+"""
+PropertyConnect Recommendation Engine
+Scores the active property catalog against user preferences in one vectorized pass
+
+The catalog is held as a columnar NumPy feature matrix that is updated in place
+as listings are added, changed or removed.
+"""
+
+import json
+import threading
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from api.changelog import ChangeLogStore
+
+# Feature matrix columns
+PRICE, BEDROOMS, BATHROOMS, AREA, PROPERTY_TYPE, LOCATION = range(6)
+NUM_FEATURES = 6
+
+# Relative importance of each preference when it is specified
+DEFAULT_WEIGHTS = {
+    'budget': 0.35,
+    'location': 0.25,
+    'propertyType': 0.20,
+    'bedrooms': 0.12,
+    'bathrooms': 0.08
+}
+
+# Fraction over budget at which the budget score reaches zero
+OVER_BUDGET_TOLERANCE = 0.2
+
+# Listing fields that must be non-negative numbers when present
+NUMERIC_FIELDS = ('price', 'bedrooms', 'bathrooms', 'area')
+
+
+def validate_listing(listing: Any) -> Dict[str, Any]:
+    """Copy of a listing with numeric fields coerced to numbers; raises ValueError on bad input"""
+    if not isinstance(listing, dict) or listing.get('id') in (None, ''):
+        raise ValueError('Every property needs an id')
+
+    cleaned = dict(listing)
+    for field in NUMERIC_FIELDS:
+        value = listing.get(field)
+        if value is None or value == '':
+            continue
+        try:
+            if isinstance(value, bool):
+                raise TypeError(field)
+            number = float(value)
+        except (TypeError, ValueError):
+            number = float('nan')
+        if not np.isfinite(number) or number < 0:
+            raise ValueError(f"Property {listing['id']}: {field} must be a non-negative number")
+        cleaned[field] = number
+    return cleaned
+
+
+class PropertyCatalog:
+    """Columnar in-memory catalog of active listings with vectorized scoring"""
+
+    def __init__(self, capacity: int = 1024, weights: Optional[Dict[str, float]] = None,
+                 location_resolver=None):
+        self.features = np.zeros((capacity, NUM_FEATURES), dtype=np.float64)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.property_types: Dict[str, int] = {}
+        self.locations: Dict[str, int] = {}
+        self.location_resolver = location_resolver
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def normalize(value: Any) -> str:
+        """Normalize a categorical value for matching"""
+        return str(value).strip().lower()
+
+    def canonical_location(self, location: str) -> str:
+        """Region id for a location when it resolves, else the normalized text"""
+        region_id = self.location_resolver.region_id(location) if self.location_resolver else None
+        return region_id or self.normalize(location)
+
+    def location_key(self, listing: Dict[str, Any]) -> str:
+        """Categorical location a listing is matched on"""
+        return self.canonical_location(listing.get('city') or listing.get('location') or listing.get('address', ''))
+
+    def _code(self, vocabulary: Dict[str, int], value: Any) -> int:
+        key = self.normalize(value)
+        if key not in vocabulary:
+            vocabulary[key] = len(vocabulary)
+        return vocabulary[key]
+
+    def _vectorize(self, listing: Dict[str, Any]) -> np.ndarray:
+        return np.array([
+            # Unknown prices are NaN so they cannot pass for a bargain
+            float(listing.get('price') or np.nan),
+            float(listing.get('bedrooms') or 0),
+            float(listing.get('bathrooms') or 0),
+            float(listing.get('area') or 0),
+            self._code(self.property_types, listing.get('type', '')),
+            self._code(self.locations, self.location_key(listing))
+        ], dtype=np.float64)
+
+    def upsert(self, listing: Dict[str, Any]) -> None:
+        """Add a listing or update its features in place"""
+        property_id = str(listing['id'])
+        with self._lock:
+            vector = self._vectorize(listing)
+            row = self.rows.get(property_id)
+            if row is None:
+                row = len(self.ids)
+                if row == len(self.features):
+                    self.features = np.concatenate([self.features, np.zeros_like(self.features)])
+                self.ids.append(property_id)
+                self.rows[property_id] = row
+            self.features[row] = vector
+
+    def remove(self, property_id: str) -> bool:
+        """Remove a listing by moving the last row into its slot"""
+        property_id = str(property_id)
+        with self._lock:
+            row = self.rows.pop(property_id, None)
+            if row is None:
+                return False
+            last = len(self.ids) - 1
+            if row != last:
+                moved_id = self.ids[last]
+                self.features[row] = self.features[last]
+                self.ids[row] = moved_id
+                self.rows[moved_id] = row
+            self.ids.pop()
+            return True
+
+    def score(self, preferences: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Score every listing against the preferences, one array per specified feature"""
+        n = len(self.ids)
+        features = self.features[:n]
+        scores: Dict[str, np.ndarray] = {}
+
+        budget = float(preferences.get('budget') or 0)
+        if budget > 0:
+            price = features[:, PRICE]
+            over = np.clip((price - budget) / budget, 0.0, None)
+            under = np.clip((budget - price) / budget, 0.0, 1.0)
+            # Over budget falls off quickly; well under budget is only mildly
+            # penalized; listings without a price score zero
+            scores['budget'] = np.where(np.isnan(price), 0.0,
+                                        np.where(price > budget,
+                                                 np.clip(1.0 - over / OVER_BUDGET_TOLERANCE, 0.0, 1.0),
+                                                 1.0 - 0.5 * under))
+
+        for name, column in (('bedrooms', BEDROOMS), ('bathrooms', BATHROOMS)):
+            wanted = float(preferences.get(name) or 0)
+            if wanted > 0:
+                shortfall = np.clip(wanted - features[:, column], 0.0, None)
+                scores[name] = np.clip(1.0 - 0.5 * shortfall, 0.0, 1.0)
+
+        if preferences.get('propertyType'):
+            code = self.property_types.get(self.normalize(preferences['propertyType']), -1)
+            scores['propertyType'] = (features[:, PROPERTY_TYPE] == code).astype(np.float64)
+
+        if preferences.get('location'):
+            code = self.locations.get(self.normalize(self.canonical_location(preferences['location'])), -1)
+            scores['location'] = (features[:, LOCATION] == code).astype(np.float64)
+
+        return scores
+
+    def recommend(self, preferences: Dict[str, Any], limit: int = 10) -> List[Dict[str, Any]]:
+        """Return the top listings for the preferences with a per-feature score breakdown"""
+        with self._lock:
+            n = len(self.ids)
+            if n == 0 or limit <= 0:
+                return []
+
+            scores = self.score(preferences)
+            total_weight = sum(self.weights.get(name, 0.0) for name in scores)
+            if total_weight:
+                total = sum(self.weights.get(name, 0.0) * values for name, values in scores.items()) / total_weight
+            else:
+                total = np.zeros(n)
+
+            k = min(limit, n)
+            top = np.argpartition(-total, k - 1)[:k]
+            top = top[np.argsort(-total[top], kind='stable')]
+
+            return [
+                {
+                    'property_id': self.ids[row],
+                    'score': round(float(total[row]), 4),
+                    'breakdown': {name: round(float(values[row]), 4) for name, values in scores.items()}
+                }
+                for row in top
+            ]
+
+
+class CatalogStore(ChangeLogStore):
+    """Shares catalog changes between worker processes through Redis
+
+    Listings live in a Redis hash and every change is appended to a capped
+    change stream, so each process only replays the changes it has not seen.
+    """
+
+    label = 'catalog'
+
+    def __init__(self, redis_client, catalog: PropertyCatalog, namespace: str = 'property_catalog',
+                 max_changes: int = 10000):
+        super().__init__(redis_client, f"{namespace}:listings", f"{namespace}:stream", max_changes)
+        self.catalog = catalog
+
+    def _apply(self, key: str, value: Optional[bytes]) -> None:
+        if not value:
+            self.catalog.remove(key)
+            return
+        try:
+            listing = validate_listing(json.loads(value))
+        except ValueError as e:
+            # Skip a bad listing rather than abort the replay of every later change
+            print(f"Skipping invalid catalog listing {key}: {e}")
+            self.catalog.remove(key)
+            return
+        self.catalog.upsert(listing)
+
+    def _local_keys(self) -> List[str]:
+        return list(self.catalog.ids)
+
+    def upsert(self, listings: List[Dict[str, Any]]) -> None:
+        """Add or update listings for every process; raises ValueError before writing anything if one is invalid"""
+        listings = [validate_listing(listing) for listing in listings]
+        if not listings:
+            return
+        pipe = self.redis.pipeline()
+        for listing in listings:
+            pipe.hset(self.values_key, str(listing['id']), json.dumps(listing))
+        self._log_changes(pipe, [str(listing['id']) for listing in listings])
+        pipe.execute()
+        self.sync()
+
+    def remove(self, property_id: str) -> bool:
+        """Remove a listing for every process"""
+        pipe = self.redis.pipeline()
+        pipe.hdel(self.values_key, str(property_id))
+        self._log_changes(pipe, [str(property_id)])
+        removed, _ = pipe.execute()
+        self.sync()
+        return bool(removed)
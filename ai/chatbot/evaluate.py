@@ -0,0 +1,267 @@
+"""
+PropertyConnect Intent Matching Evaluation
+Measures accuracy and latency of intent-matching configurations on a labelled corpus
+
+Run from the ai/ directory:
+
+    python -m chatbot.evaluate --target 0.8
+
+Each similarity backend (spaCy vectors when installed, word overlap otherwise) is
+timed on the real matcher. Pattern scores are then computed once per backend so
+the scoring weights and threshold can be grid-searched without re-running NLP.
+Tuned accuracy is estimated with stratified k-fold cross-validation, so a
+configuration is chosen on messages it was not tuned on.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from chatbot.main import PropertyChatbot, SPACY_AVAILABLE
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'eval_corpus.json')
+
+# Label used for messages that should not match any intent
+NO_INTENT = 'fallback'
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """Load labelled messages; an intent of null means no intent should match"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)['messages']
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile of a list of values"""
+    return float(np.percentile(values, pct)) if values else 0.0
+
+
+class IntentEvaluator:
+    """Evaluates intent-matching configurations against a labelled corpus"""
+
+    def __init__(self, chatbot: PropertyChatbot, corpus: List[Dict[str, Any]]):
+        self.chatbot = chatbot
+        self.messages = [item['message'] for item in corpus]
+        self.labels = [item.get('intent') or NO_INTENT for item in corpus]
+        self.tags = [intent['tag'] for intent in chatbot.intents['intents']
+                     for _ in intent['patterns']]
+
+    def backends(self) -> List[str]:
+        """Similarity backends available in this environment"""
+        return ['spacy', 'overlap'] if SPACY_AVAILABLE else ['overlap']
+
+    def time_backend(self, backend: str) -> List[float]:
+        """Per-message latency in milliseconds of find_best_intent on a backend"""
+        self.chatbot.use_spacy = backend == 'spacy'
+        latencies = []
+        for message in self.messages:
+            start = time.perf_counter()
+            self.chatbot.find_best_intent(message)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    def pattern_scores(self, backend: str) -> np.ndarray:
+        """Component scores with shape (messages, patterns, 3)"""
+        self.chatbot.use_spacy = backend == 'spacy'
+        return np.array([
+            [components for _, *components in self.chatbot.score_patterns(message)]
+            for message in self.messages
+        ], dtype=np.float64)
+
+    def predict(self, scores: np.ndarray, weights: np.ndarray, threshold: float) -> List[str]:
+        """Predicted tags for weights (overlap, similarity, exact match) and threshold"""
+        totals = scores @ weights
+        best = totals.argmax(axis=1)
+        best_scores = totals[np.arange(len(best)), best]
+        return [self.tags[pattern] if score > threshold else NO_INTENT
+                for pattern, score in zip(best, best_scores)]
+
+    def accuracy(self, predictions: List[str], indices: Optional[np.ndarray] = None) -> float:
+        """Fraction of messages (all, or those at ``indices``) whose predicted tag matches the label"""
+        labels = self.labels if indices is None else [self.labels[i] for i in indices]
+        correct = sum(1 for label, predicted in zip(labels, predictions) if label == predicted)
+        return correct / len(labels) if labels else 0.0
+
+    def confusion(self, predictions: List[str]) -> Dict[str, Dict[str, int]]:
+        """Confusion matrix as label -> predicted tag -> count"""
+        matrix: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for label, predicted in zip(self.labels, predictions):
+            matrix[label][predicted] += 1
+        return {label: dict(row) for label, row in matrix.items()}
+
+    def grid_search(self, scores: np.ndarray, step: float = 0.1, thresholds: Optional[List[float]] = None,
+                    indices: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Find the most accurate weights and threshold on the messages at ``indices`` (default all)
+
+        Weights sum to one.
+        """
+        thresholds = thresholds or [round(t, 2) for t in np.arange(0.1, 0.65, 0.05)]
+        steps = int(round(1 / step))
+        subset = scores if indices is None else scores[indices]
+        best: Dict[str, Any] = {'accuracy': -1.0}
+
+        for i, j in itertools.product(range(steps + 1), repeat=2):
+            if i + j > steps:
+                continue
+            weights = np.array([i, j, steps - i - j], dtype=np.float64) / steps
+            for threshold in thresholds:
+                accuracy = self.accuracy(self.predict(subset, weights, threshold), indices)
+                if accuracy > best['accuracy']:
+                    best = {
+                        'accuracy': accuracy,
+                        'weights': {
+                            'overlap': round(float(weights[0]), 3),
+                            'similarity': round(float(weights[1]), 3),
+                            'exact_match': round(float(weights[2]), 3)
+                        },
+                        'threshold': threshold
+                    }
+
+        return best
+
+    def folds(self, k: int, seed: int = 0) -> List[np.ndarray]:
+        """Stratified k-fold split: each label's messages are dealt across the folds"""
+        rng = np.random.RandomState(seed)
+        by_label: Dict[str, List[int]] = defaultdict(list)
+        for index, label in enumerate(self.labels):
+            by_label[label].append(index)
+
+        assignment = np.empty(len(self.labels), dtype=int)
+        offset = 0
+        for label in sorted(by_label):
+            indices = rng.permutation(by_label[label])
+            assignment[indices] = (np.arange(len(indices)) + offset) % k
+            offset += len(indices)
+        return [np.flatnonzero(assignment == fold) for fold in range(k)]
+
+    def cross_validate(self, scores: np.ndarray, k: int = 5, seed: int = 0) -> Dict[str, Any]:
+        """Held-out accuracy of grid-search tuning: tune on k-1 folds, score the remaining one"""
+        predictions: List[str] = [NO_INTENT] * len(self.labels)
+        fold_accuracies = []
+
+        for test in self.folds(k, seed):
+            train = np.setdiff1d(np.arange(len(self.labels)), test)
+            tuned = self.grid_search(scores, indices=train)
+            weights = np.array([tuned['weights'][name] for name in ('overlap', 'similarity', 'exact_match')])
+            fold_predictions = self.predict(scores[test], weights, tuned['threshold'])
+            fold_accuracies.append(round(self.accuracy(fold_predictions, test), 3))
+            for index, predicted in zip(test, fold_predictions):
+                predictions[index] = predicted
+
+        return {'accuracy': self.accuracy(predictions), 'folds': fold_accuracies}
+
+    def evaluate(self, grid: bool = True, folds: int = 5) -> List[Dict[str, Any]]:
+        """Report accuracy, confusion and latency for each backend"""
+        current = np.array([self.chatbot.overlap_weight, self.chatbot.similarity_weight,
+                            self.chatbot.exact_match_weight])
+        threshold = self.chatbot.intent_threshold
+        use_spacy = self.chatbot.use_spacy
+        reports = []
+
+        try:
+            for backend in self.backends():
+                latencies = self.time_backend(backend)
+                scores = self.pattern_scores(backend)
+                predictions = self.predict(scores, current, threshold)
+
+                report = {
+                    'backend': backend,
+                    'accuracy': self.accuracy(predictions),
+                    'confusion': self.confusion(predictions),
+                    'latency_ms': {
+                        'p50': percentile(latencies, 50),
+                        'p95': percentile(latencies, 95),
+                        'p99': percentile(latencies, 99)
+                    }
+                }
+                if grid:
+                    # Weights to deploy are tuned on the whole corpus; their
+                    # accuracy there is in-sample, so report the cross-validated
+                    # accuracy of the tuning procedure alongside it
+                    best = self.grid_search(scores)
+                    held_out = self.cross_validate(scores, folds)
+                    report['best'] = {
+                        'weights': best['weights'],
+                        'threshold': best['threshold'],
+                        'in_sample_accuracy': best['accuracy'],
+                        'held_out_accuracy': held_out['accuracy'],
+                        'fold_accuracies': held_out['folds']
+                    }
+                reports.append(report)
+        finally:
+            self.chatbot.use_spacy = use_spacy
+
+        return reports
+
+
+def expected_accuracy(report: Dict[str, Any]) -> float:
+    """Held-out accuracy when the backend was tuned, else accuracy of the current weights"""
+    return report['best']['held_out_accuracy'] if 'best' in report else report['accuracy']
+
+
+def choose_configuration(reports: List[Dict[str, Any]], target: float) -> Optional[Dict[str, Any]]:
+    """Pick the fastest backend whose held-out accuracy meets the target"""
+    candidates = [report for report in reports if expected_accuracy(report) >= target]
+    return min(candidates, key=lambda report: report['latency_ms']['p50']) if candidates else None
+
+
+def print_report(reports: List[Dict[str, Any]], target: float) -> None:
+    """Print reports side by side"""
+    print(f"{'backend':<10}{'accuracy':>10}{'tuned':>10}{'held-out':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for report in reports:
+        tuned = report['best']['in_sample_accuracy'] if 'best' in report else report['accuracy']
+        latency = report['latency_ms']
+        print(f"{report['backend']:<10}{report['accuracy']:>10.3f}{tuned:>10.3f}{expected_accuracy(report):>10.3f}"
+              f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}")
+
+    for report in reports:
+        print(f"\nConfusion ({report['backend']}, current weights):")
+        for label, row in sorted(report['confusion'].items()):
+            errors = {tag: count for tag, count in row.items() if tag != label}
+            print(f"  {label:<18} correct={row.get(label, 0)} errors={errors or '-'}")
+        if 'best' in report:
+            best = report['best']
+            print(f"  best weights={best['weights']} threshold={best['threshold']} "
+                  f"held-out fold accuracies={best['fold_accuracies']}")
+
+    choice = choose_configuration(reports, target)
+    print()
+    if choice:
+        print(f"Cheapest configuration meeting {target:.0%} accuracy: {choice['backend']}"
+              + (f" with {choice['best']['weights']} threshold={choice['best']['threshold']}" if 'best' in choice else ''))
+    else:
+        print(f"No configuration meets {target:.0%} accuracy")
+
+
+def main():
+    """Run the evaluation harness"""
+    parser = argparse.ArgumentParser(description='Evaluate intent-matching configurations')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Labelled corpus JSON file')
+    parser.add_argument('--target', type=float, default=0.8, help='Accuracy target')
+    parser.add_argument('--no-grid', action='store_true', help='Skip the weight/threshold grid search')
+    parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds for held-out accuracy')
+    parser.add_argument('--output', help='Also write the reports as JSON to this file')
+    args = parser.parse_args()
+
+    evaluator = IntentEvaluator(PropertyChatbot(), load_corpus(args.corpus))
+    reports = evaluator.evaluate(grid=not args.no_grid, folds=args.folds)
+
+    print_report(reports, args.target)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({
+                'target': args.target,
+                'reports': reports,
+                'choice': choose_configuration(reports, args.target)
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
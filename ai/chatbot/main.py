@@ -1,7 +1,9 @@
 import json
 import random
 import re
-from typing import Dict, List, Any, Optional
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Any, Optional, Iterator, Tuple, Callable, ContextManager
 import os
 from dotenv import load_dotenv
 
@@ -75,6 +77,20 @@ class PropertyChatbot:
         self.intents = self.load_intents()
         self.context: Dict[str, Any] = {}
         
+        # Intent matching configuration (tuned with chatbot/evaluate.py)
+        self.overlap_weight = 0.4
+        self.similarity_weight = 0.5
+        self.exact_match_weight = 0.1
+        self.intent_threshold = 0.3
+        self.use_spacy = SPACY_AVAILABLE
+        
+        # Optional callable(fn, *args) that runs CPU-bound intent matching off the
+        # calling thread (e.g. eventlet.tpool.execute in the chat gateway)
+        self.match_executor = None
+        
+        # Optional sink with a non-blocking log(record) method (e.g. InteractionLogger)
+        self.interaction_log = None
+        
     def load_intents(self) -> Dict[str, Any]:
         """Load intents from JSON file"""
         try:
@@ -236,7 +252,7 @@ class PropertyChatbot:
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two texts"""
-        if SPACY_AVAILABLE:
+        if self.use_spacy:
             doc1 = nlp(text1.lower())
             doc2 = nlp(text2.lower())
             return doc1.similarity(doc2)
@@ -250,9 +266,29 @@ class PropertyChatbot:
     
     def find_best_intent(self, user_input: str) -> Optional[Dict[str, Any]]:
         """Find the best matching intent"""
-        processed_input = self.preprocess_text(user_input)
+        intent, score = self.score_intent(user_input)
+        return intent if score > self.intent_threshold else None
+    
+    def score_intent(self, user_input: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Find the highest scoring intent and its score, regardless of threshold"""
         best_match = None
-        highest_score = 0
+        highest_score = 0.0
+        
+        for intent, overlap_score, similarity_score, exact_match_bonus in self.score_patterns(user_input):
+            # Combined score
+            total_score = (overlap_score * self.overlap_weight +
+                           similarity_score * self.similarity_weight +
+                           exact_match_bonus * self.exact_match_weight)
+            
+            if total_score > highest_score:
+                highest_score = total_score
+                best_match = intent
+        
+        return best_match, highest_score
+    
+    def score_patterns(self, user_input: str) -> Iterator[Tuple[Dict[str, Any], float, float, float]]:
+        """Yield each intent pattern's overlap, similarity and exact match scores"""
+        processed_input = self.preprocess_text(user_input)
         
         for intent in self.intents["intents"]:
             for pattern in intent["patterns"]:
@@ -269,72 +305,175 @@ class PropertyChatbot:
                 # 3. Exact match bonus
                 exact_match_bonus = 1.0 if user_input.lower() == pattern.lower() else 0.0
                 
-                # Combined score
-                total_score = (overlap_score * 0.4 + similarity_score * 0.5 + exact_match_bonus * 0.1)
-                
-                if total_score > highest_score:
-                    highest_score = total_score
-                    best_match = intent
-        
-        return best_match if highest_score > 0.3 else None
+                yield intent, overlap_score, similarity_score, exact_match_bonus
     
     def get_response(self, intent: Dict[str, Any]) -> str:
         """Get a random response for the given intent"""
         responses = intent["responses"]
         return random.choice(responses)
     
+    def build_ai_messages(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """Build the chat completion messages for an AI-powered response"""
+        system_prompt = """You are a helpful real estate assistant for PropertyConnect. 
+            You help users find properties, understand market trends, and make informed decisions. 
+            Be friendly, professional, and provide accurate information. Keep responses concise and helpful."""
+        
+        user_prompt = f"User context: {context or {}}\nUser message: {user_input}\n\nProvide a helpful response about real estate."
+        
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
     def generate_ai_response(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Generate AI-powered response using OpenAI"""
+        return self.complete_ai_response(user_input, context)[0]
+    
+    def complete_ai_response(self, user_input: str,
+                             context: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[int]]:
+        """Generate an AI response along with the total tokens OpenAI reports for it, if any"""
         if not OPENAI_AVAILABLE:
-            return "I'm having trouble processing your request right now. Please try again later."
+            return "I'm having trouble processing your request right now. Please try again later.", None
         
         try:
-            system_prompt = """You are a helpful real estate assistant for PropertyConnect. 
-            You help users find properties, understand market trends, and make informed decisions. 
-            Be friendly, professional, and provide accurate information. Keep responses concise and helpful."""
-            
-            user_prompt = f"User context: {context or {}}\nUser message: {user_input}\n\nProvide a helpful response about real estate."
-            
             response = openai.ChatCompletion.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=self.build_ai_messages(user_input, context),
                 max_tokens=150,
                 temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            usage = getattr(getattr(response, 'usage', None), 'total_tokens', None)
+            return response.choices[0].message.content.strip(), usage
         except Exception as e:
             print(f"AI response generation failed: {e}")
-            return "I'm having trouble processing your request right now. Please try again later."
+            return "I'm having trouble processing your request right now. Please try again later.", None
     
-    def process_message(self, user_input: str, use_ai: bool = False) -> str:
-        """Process user message and return appropriate response"""
+    def stream_ai_response(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream an AI-powered response from OpenAI token by token"""
+        if not OPENAI_AVAILABLE:
+            yield "I'm having trouble processing your request right now. Please try again later."
+            return
+        
+        try:
+            response = openai.ChatCompletion.create(
+                model="gpt-3.5-turbo",
+                messages=self.build_ai_messages(user_input, context),
+                max_tokens=150,
+                temperature=0.7,
+                stream=True
+            )
+            
+            for chunk in response:
+                token = chunk.choices[0].delta.get('content')
+                if token:
+                    yield token
+        except Exception as e:
+            print(f"AI response streaming failed: {e}")
+            yield "I'm having trouble processing your request right now. Please try again later."
+    
+    def process_message(self, user_input: str, use_ai: bool = False,
+                        context: Optional[Dict[str, Any]] = None) -> str:
+        """Process user message and return appropriate response
+        
+        ``context`` lets callers that share one chatbot between many users
+        (e.g. the WebSocket gateway) keep per-session state; it defaults to
+        the chatbot's own context.
+        """
+        return "".join(self.stream_message(user_input, use_ai, context, stream=False))
+    
+    def stream_message(self, user_input: str, use_ai: bool = False,
+                       context: Optional[Dict[str, Any]] = None, stream: bool = True,
+                       admit: Optional[Callable[[], ContextManager]] = None) -> Iterator[str]:
+        """Process user message and yield the response in chunks
+        
+        ``admit`` optionally guards the OpenAI call: it returns a context
+        manager that holds an LLM slot and raises when the call is shed
+        (e.g. AdmissionController.admit), in which case only the intent
+        response or a busy message is sent. An admitted completion is read in
+        full before the slot is released, so a slow consumer cannot hold it.
+        
+        The turn is logged with ``tokens``, the total OpenAI usage, and
+        ``chunks``, the number of streamed pieces. Streamed completions do not
+        report usage, so ``tokens`` is only known when ``stream`` is False.
+        """
+        if context is None:
+            context = self.context
+        
+        start = time.perf_counter()
+        turn = {'intent': None, 'score': 0.0, 'tokens': None, 'chunks': None, 'shed_reason': None}
+        
+        try:
+            yield from self._respond(user_input, use_ai, context, stream, turn, admit)
+        finally:
+            # Also runs when a caller abandons the stream part-way
+            if self.interaction_log is not None:
+                self.interaction_log.log({
+                    'kind': 'chat_turn',
+                    'message': user_input,
+                    'use_ai': use_ai,
+                    'intent': turn['intent'],
+                    'score': round(turn['score'], 4),
+                    'tokens': turn['tokens'],
+                    'chunks': turn['chunks'],
+                    'shed_reason': turn['shed_reason'],
+                    'latency_ms': round((time.perf_counter() - start) * 1000, 2)
+                })
+    
+    def _respond(self, user_input: str, use_ai: bool, context: Dict[str, Any], stream: bool,
+                 turn: Dict[str, Any], admit: Optional[Callable[[], ContextManager]]) -> Iterator[str]:
         if not user_input.strip():
-            return "I didn't catch that. Could you please repeat?"
+            yield "I didn't catch that. Could you please repeat?"
+            return
         
         # Find best matching intent
-        intent = self.find_best_intent(user_input)
+        if self.match_executor is not None:
+            intent, turn['score'] = self.match_executor(self.score_intent, user_input)
+        else:
+            intent, turn['score'] = self.score_intent(user_input)
+        if turn['score'] <= self.intent_threshold:
+            intent = None
         
         if intent:
             # Update context
-            self.context['last_intent'] = intent['tag']
+            context['last_intent'] = turn['intent'] = intent['tag']
             
-            if use_ai:
-                # Use AI to enhance the response
-                base_response = self.get_response(intent)
-                ai_response = self.generate_ai_response(user_input, self.context)
-                return f"{base_response}\n\n{ai_response}"
-            else:
-                return self.get_response(intent)
-        else:
-            if use_ai:
-                # Use AI for unknown intents
-                return self.generate_ai_response(user_input, self.context)
+            yield self.get_response(intent)
+            if not use_ai:
+                return
+        elif not use_ai:
+            yield "I'm not sure I understand. Could you rephrase that or ask about properties, prices, locations, or agents?"
+            return
+        
+        # Use AI to answer (or enhance the answer to) the message
+        with ExitStack() as stack:
+            if admit is not None:
+                try:
+                    stack.enter_context(admit())
+                except Exception as e:
+                    turn['shed_reason'] = getattr(e, 'reason', str(e))
+                    if not intent:
+                        yield "I'm getting a lot of questions right now. Please try again in a moment."
+                    return
+            
+            if not stream:
+                reply, turn['tokens'] = self.complete_ai_response(user_input, context)
+                chunks = [reply]
+            elif admit is not None:
+                # Buffer the short completion so the LLM slot is released before
+                # the caller's flow control can stall on a slow client
+                chunks = list(self.stream_ai_response(user_input, context))
             else:
-                return "I'm not sure I understand. Could you rephrase that or ask about properties, prices, locations, or agents?"
+                chunks = self.stream_ai_response(user_input, context)
+        
+        if intent:
+            yield "\n\n"
+        if stream:
+            turn['chunks'] = 0
+        for chunk in chunks:
+            if stream:
+                turn['chunks'] += 1
+            yield chunk
     
     def reset_context(self) -> None:
         """Reset conversation context"""
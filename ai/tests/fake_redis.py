@@ -0,0 +1,285 @@
+"""
+In-process stand-in for the subset of Redis used by the AI service
+
+Values and members come back as bytes, like a real client without
+decode_responses, and keys honour their TTLs. Set ``fail`` to simulate an
+outage: every command then raises redis.ConnectionError. ``calls`` counts
+round trips, with a pipeline execute counting as one.
+"""
+
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+import redis
+
+
+def encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode('utf-8')
+
+
+def stream_position(entry_id: Any) -> tuple:
+    millis, _, seq = encode(entry_id).decode('utf-8').partition('-')
+    return int(millis), int(seq or 0)
+
+
+def in_range(entry_id: bytes, low: str, high: str) -> bool:
+    position = stream_position(entry_id)
+    if low != '-':
+        exclusive = low.startswith('(')
+        bound = stream_position(low.lstrip('('))
+        if position < bound or (exclusive and position == bound):
+            return False
+    if high != '+':
+        exclusive = high.startswith('(')
+        bound = stream_position(high.lstrip('('))
+        if position > bound or (exclusive and position == bound):
+            return False
+    return True
+
+
+class FakeRedis:
+    """Thread-safe in-memory Redis"""
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.expires: Dict[str, float] = {}
+        self.fail = False
+        self.calls = 0
+        self._cond = threading.Condition()
+
+    def __getattribute__(self, name: str):
+        attribute = object.__getattribute__(self, name)
+        if name.startswith('_') or name == 'pipeline' or not callable(attribute):
+            return attribute
+
+        def command(*args, **kwargs):
+            self._round_trip()
+            return attribute(*args, **kwargs)
+        return command
+
+    def _round_trip(self) -> None:
+        object.__setattr__(self, 'calls', self.calls + 1)
+        if self.fail:
+            raise redis.ConnectionError('Simulated Redis outage')
+
+    def _live(self, key: str) -> Optional[Any]:
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    # Strings
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._cond:
+            return self._live(key)
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None, nx: bool = False) -> Optional[bool]:
+        return self._set(key, value, ex, nx)
+
+    def _set(self, key: str, value: Any, ex: Optional[float] = None, nx: bool = False) -> Optional[bool]:
+        with self._cond:
+            if nx and self._live(key) is not None:
+                return None
+            self.data[key] = encode(value)
+            if ex is not None:
+                self.expires[key] = time.monotonic() + ex
+            else:
+                self.expires.pop(key, None)
+            return True
+
+    def setex(self, key: str, ttl: float, value: Any) -> bool:
+        return bool(self._set(key, value, ttl))
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._cond:
+            return [self._live(key) for key in keys]
+
+    def delete(self, *keys: str) -> int:
+        with self._cond:
+            removed = 0
+            for key in keys:
+                if self._live(key) is not None:
+                    removed += 1
+                self.data.pop(key, None)
+                self.expires.pop(key, None)
+            return removed
+
+    def expire(self, key: str, seconds: float) -> bool:
+        with self._cond:
+            if self._live(key) is None:
+                return False
+            self.expires[key] = time.monotonic() + seconds
+            return True
+
+    # Hashes
+
+    def hset(self, key: str, field: Any, value: Any) -> int:
+        with self._cond:
+            hash_ = self.data.setdefault(key, {})
+            added = encode(field) not in hash_
+            hash_[encode(field)] = encode(value)
+            return int(added)
+
+    def hdel(self, key: str, *fields: Any) -> int:
+        with self._cond:
+            hash_ = self._live(key) or {}
+            return sum(hash_.pop(encode(field), None) is not None for field in fields)
+
+    def hmget(self, key: str, fields: List[Any]) -> List[Optional[bytes]]:
+        with self._cond:
+            hash_ = self._live(key) or {}
+            return [hash_.get(encode(field)) for field in fields]
+
+    def hgetall(self, key: str) -> Dict[bytes, bytes]:
+        with self._cond:
+            return dict(self._live(key) or {})
+
+    # Streams
+
+    def xadd(self, key: str, fields: Dict[str, Any], maxlen: Optional[int] = None,
+             approximate: bool = True) -> bytes:
+        with self._cond:
+            stream = self.data.setdefault(key, [])
+            millis = int(time.time() * 1000)
+            last = stream_position(stream[-1][0]) if stream else (0, 0)
+            position = (millis, 0) if millis > last[0] else (last[0], last[1] + 1)
+            entry_id = f"{position[0]}-{position[1]}".encode('utf-8')
+            stream.append((entry_id, {encode(name): encode(value) for name, value in fields.items()}))
+            if maxlen is not None:
+                del stream[:max(len(stream) - maxlen, 0)]
+            return entry_id
+
+    def xrange(self, key: str, min: str = '-', max: str = '+', count: Optional[int] = None) -> list:
+        with self._cond:
+            entries = [entry for entry in self._live(key) or [] if in_range(entry[0], min, max)]
+            return entries[:count] if count else entries
+
+    def xrevrange(self, key: str, max: str = '+', min: str = '-', count: Optional[int] = None) -> list:
+        with self._cond:
+            entries = [entry for entry in reversed(self._live(key) or []) if in_range(entry[0], min, max)]
+            return entries[:count] if count else entries
+
+    def pipeline(self, transaction: bool = True) -> 'FakePipeline':
+        return FakePipeline(self)
+
+    # Sets
+
+    def sadd(self, key: str, *members: Any) -> int:
+        with self._cond:
+            current = self.data.setdefault(key, set())
+            added = {encode(member) for member in members} - current
+            current.update(added)
+            return len(added)
+
+    def smembers(self, key: str) -> set:
+        with self._cond:
+            return set(self._live(key) or ())
+
+    # Sorted sets
+
+    def lpush(self, key: str, *values: Any) -> int:
+        with self._cond:
+            items = self.data.setdefault(key, [])
+            for value in values:
+                items.insert(0, encode(value))
+            return len(items)
+
+    def ltrim(self, key: str, start: int, end: int) -> bool:
+        with self._cond:
+            items = self._live(key)
+            if items is not None:
+                self.data[key] = items[start:end + 1 if end != -1 else None]
+            return True
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        with self._cond:
+            return list((self._live(key) or [])[start:end + 1 if end != -1 else None])
+
+    def zadd(self, key: str, mapping: Dict[Any, float], nx: bool = False, xx: bool = False) -> int:
+        with self._cond:
+            zset = self.data.setdefault(key, {})
+            added = 0
+            for member, score in mapping.items():
+                member = encode(member)
+                if (nx and member in zset) or (xx and member not in zset):
+                    continue
+                added += member not in zset
+                zset[member] = float(score)
+            self._cond.notify_all()
+            return added
+
+    def zrem(self, key: str, *members: Any) -> int:
+        with self._cond:
+            zset = self._live(key) or {}
+            return sum(zset.pop(encode(member), None) is not None for member in members)
+
+    def zscore(self, key: str, member: Any) -> Optional[float]:
+        with self._cond:
+            return (self._live(key) or {}).get(encode(member))
+
+    def zrangebyscore(self, key: str, low: Any, high: Any) -> List[bytes]:
+        low, high = float(low), float(high)
+        with self._cond:
+            zset = self._live(key) or {}
+            return [member for member, score in sorted(zset.items(), key=lambda item: (item[1], item[0]))
+                    if low <= score <= high]
+
+    def bzpopmin(self, key: str, timeout: float = 0) -> Optional[tuple]:
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while not self._live(key):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            zset = self.data[key]
+            member = min(zset, key=lambda m: (zset[m], m))
+            return key.encode('utf-8'), member, zset.pop(member)
+
+
+class FakePipeline:
+    """Buffers commands and runs them together on execute"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands: List[Any] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List[Any]:
+        commands, self.commands = self.commands, []
+        self.client._round_trip()
+        with self.client._cond:
+            return [object.__getattribute__(self.client, name)(*args, **kwargs)
+                    for name, args, kwargs in commands]
+
+
+class AsyncFakeRedis:
+    """asyncio client over a FakeRedis"""
+
+    def __init__(self, backend: Optional[FakeRedis] = None):
+        self.backend = backend or FakeRedis()
+
+    def __getattr__(self, name: str):
+        method = getattr(self.backend, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+    def pipeline(self, transaction: bool = True) -> 'AsyncFakePipeline':
+        return AsyncFakePipeline(self.backend)
+
+
+class AsyncFakePipeline(FakePipeline):
+    async def execute(self) -> List[Any]:
+        return FakePipeline.execute(self)
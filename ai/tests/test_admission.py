@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+from api.admission import AdmissionController, LoadShed, RateLimited, TokenBucket
+
+
+def controller(**overrides):
+    settings = dict(concurrency=1, max_queue=2, max_wait_seconds=2.0, user_rate=100, user_burst=100,
+                    expected_service_seconds=0.01)
+    settings.update(overrides)
+    return AdmissionController(**settings)
+
+
+class Waiter(threading.Thread):
+    """Queues for a slot in the background and records what happened"""
+
+    def __init__(self, admission, priority, order, user='user'):
+        super().__init__(daemon=True)
+        self.admission = admission
+        self.priority = priority
+        self.order = order
+        self.user = user
+        self.outcome = None
+
+    def run(self):
+        try:
+            with self.admission.admit(self.user, self.priority):
+                self.order.append(self.priority)
+            self.outcome = 'admitted'
+        except LoadShed as e:
+            self.outcome = e.reason
+
+
+def hold_slot(admission):
+    """Occupy the only slot until the returned event is set"""
+    release, held = threading.Event(), threading.Event()
+
+    def hold():
+        with admission.admit('holder'):
+            held.set()
+            release.wait()
+
+    threading.Thread(target=hold, daemon=True).start()
+    held.wait()
+    return release
+
+
+def wait_for_queue(admission, depth):
+    deadline = time.monotonic() + 2
+    while len(admission._waiting) != depth and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert len(admission._waiting) == depth
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=100, capacity=1)
+    assert bucket.take()
+    assert not bucket.take()
+    time.sleep(0.02)
+    assert bucket.take()
+
+
+def test_user_over_rate_is_rate_limited():
+    admission = controller(user_rate=0.001, user_burst=2)
+    for _ in range(2):
+        with admission.admit('alice'):
+            pass
+
+    with pytest.raises(RateLimited):
+        with admission.admit('alice'):
+            pass
+    with admission.admit('bob'):
+        pass
+    assert admission.stats()['shed'] == {'rate_limited': 1}
+
+
+def test_waiters_are_admitted_by_priority():
+    admission = controller(max_queue=4)
+    order = []
+    release = hold_slot(admission)
+
+    waiters = []
+    for priority in ('low', 'normal', 'high'):
+        waiter = Waiter(admission, priority, order)
+        waiter.start()
+        waiters.append(waiter)
+        wait_for_queue(admission, len(waiters))
+
+    release.set()
+    for waiter in waiters:
+        waiter.join(2)
+
+    assert order == ['high', 'normal', 'low']
+
+
+def test_full_queue_evicts_lowest_priority_waiter():
+    admission = controller(max_queue=2)
+    order = []
+    release = hold_slot(admission)
+
+    first_low = Waiter(admission, 'low', order)
+    first_low.start()
+    wait_for_queue(admission, 1)
+    second_low = Waiter(admission, 'low', order)
+    second_low.start()
+    wait_for_queue(admission, 2)
+
+    high = Waiter(admission, 'high', order)
+    high.start()
+    second_low.join(2)
+    assert second_low.outcome == 'queue_full'
+    wait_for_queue(admission, 2)
+
+    release.set()
+    for waiter in (first_low, high):
+        waiter.join(2)
+
+    assert high.outcome == first_low.outcome == 'admitted'
+    assert order == ['high', 'low']
+    assert admission.stats()['shed'] == {'queue_full': 1}
+
+
+def test_full_queue_sheds_arrival_without_higher_priority():
+    admission = controller(max_queue=1)
+    release = hold_slot(admission)
+    waiter = Waiter(admission, 'high', [])
+    waiter.start()
+    wait_for_queue(admission, 1)
+
+    with pytest.raises(LoadShed) as shed:
+        with admission.admit('user', 'high'):
+            pass
+    assert shed.value.reason == 'queue_full'
+
+    release.set()
+    waiter.join(2)
+    assert waiter.outcome == 'admitted'
+
+
+def test_waiter_past_deadline_is_shed():
+    admission = controller(max_wait_seconds=0.05)
+    release = hold_slot(admission)
+
+    with pytest.raises(LoadShed) as shed:
+        with admission.admit('user'):
+            pass
+    release.set()
+
+    assert shed.value.reason == 'timeout'
+    assert admission.stats()['queue_depth'] == 0
+
+
+def test_request_over_slo_is_shed_up_front():
+    admission = controller(max_wait_seconds=1.0, expected_service_seconds=5.0)
+    release = hold_slot(admission)
+
+    started = time.monotonic()
+    with pytest.raises(LoadShed) as shed:
+        with admission.admit('user'):
+            pass
+    release.set()
+
+    assert shed.value.reason == 'slo'
+    assert time.monotonic() - started < 0.5
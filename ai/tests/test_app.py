@@ -0,0 +1,153 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from api import app as service
+from api.cache import ResilientCache
+from api.dedup import NearDuplicateIndex, SignatureStore
+from api.jobs import JobQueue
+from fake_redis import FakeRedis
+from test_dedup import DESCRIPTION, listing
+
+
+class FakeCompletion:
+    calls = 0
+
+    @classmethod
+    def create(cls, **kwargs):
+        cls.calls += 1
+        message = SimpleNamespace(content=f"analysis {cls.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=42))
+
+
+@pytest.fixture
+def analysis_service(monkeypatch):
+    client = FakeRedis()
+    index = NearDuplicateIndex(location_resolver=service.location_resolver)
+    monkeypatch.setattr(service, 'cache', ResilientCache(client))
+    monkeypatch.setattr(service, 'duplicate_index', index)
+    monkeypatch.setattr(service, 'duplicate_store', SignatureStore(client, index))
+    monkeypatch.setattr(service.openai, 'ChatCompletion', FakeCompletion, raising=False)
+    return service
+
+
+def test_relisting_reuses_analysis(analysis_service):
+    analysis_service.analyze_property_job(listing(1))
+    relisted = listing(2, description=DESCRIPTION.replace('Bright', 'Sunny'), price=489000)
+
+    result = analysis_service.analyze_property_job(relisted)
+
+    assert result['reused_from'] == '1'
+    assert 'priced at $489,000' in result['analysis']
+
+
+@pytest.mark.parametrize('candidate', [
+    listing(2, bedrooms=4, price=650000),
+    listing(2, address='14 Oak St'),
+    {'id': 2, 'type': 'house', 'city': 'Austin', 'bedrooms': 3, 'bathrooms': 2, 'price': 500000}
+])
+def test_different_property_gets_its_own_analysis(analysis_service, candidate):
+    analysis_service.analyze_property_job(listing(1))
+
+    result = analysis_service.analyze_property_job(candidate)
+
+    assert 'reused_from' not in result
+
+
+def test_repriced_listing_never_reuses_itself(analysis_service):
+    analysis_service.analyze_property_job(listing(1))
+
+    for price in (490000, 480000, 470000, 460000):
+        result = analysis_service.analyze_property_job(listing(1, price=price))
+        assert 'reused_from' not in result
+        assert 'Note:' not in result['analysis']
+
+
+def test_reused_record_keeps_the_source_analysis(analysis_service):
+    original = analysis_service.analyze_property_job(listing(1))
+    edited = DESCRIPTION.replace('Bright', 'Sunny')
+
+    first = analysis_service.analyze_property_job(listing(2, description=edited, price=470000))
+    assert first['reused_from'] == '1'
+    assert first['analysis'].count('Note:') == 1
+
+    # The stored record is the source's, so notes do not stack and the
+    # price tolerance is measured from the price the analysis was written for
+    stored = json.loads(analysis_service.cache.get('property_analysis:2'))
+    assert stored['analysis'] == original['analysis']
+    assert stored['price'] == 500000
+    assert stored['reused_from'] == '1'
+
+    again = analysis_service.analyze_property_job(listing(2, description=edited, price=460000))
+    assert again['reused_from'] == '1'
+    assert again['analysis'].count('Note:') == 1
+
+    drifted = analysis_service.analyze_property_job(listing(2, description=edited, price=440000))
+    assert 'reused_from' not in drifted
+
+
+class ListLog:
+    def __init__(self):
+        self.records = []
+
+    def log(self, record):
+        self.records.append(record)
+
+
+def test_background_jobs_are_logged_with_their_details(analysis_service, monkeypatch):
+    queue = JobQueue(FakeRedis())
+    queue.register('analyze_property', service.logged_job('analyze_property', service.analyze_property_job))
+    monkeypatch.setattr(service, 'job_queue', queue)
+    monkeypatch.setattr(service, 'interaction_log', ListLog())
+
+    first = queue.enqueue('analyze_property', listing(1))
+    second = queue.enqueue('analyze_property', listing(2, description=DESCRIPTION.replace('Bright', 'Sunny')))
+    queue.process_next(timeout=0.1)
+    queue.process_next(timeout=0.1)
+
+    generated, reused = service.interaction_log.records
+    assert generated['kind'] == 'analyze_property'
+    assert generated['job_id'] == first['id']
+    assert generated['status'] == 'done'
+    assert generated['tokens'] == 42
+    assert generated['latency_ms'] >= 0
+    assert reused['job_id'] == second['id']
+    assert reused['reused_from'] == '1'
+    # Outside a job, notes are dropped rather than leaking into the next record
+    service.note_interaction(tokens=1)
+    assert service.job_interaction.fields is None
+
+
+@pytest.fixture
+def catalog_client(monkeypatch):
+    monkeypatch.setenv('AI_SERVICE_TOKEN', 'service-secret')
+    monkeypatch.setattr(service, 'catalog_store', service.CatalogStore(FakeRedis(), service.PropertyCatalog()))
+    return service.app.test_client()
+
+
+@pytest.mark.parametrize('headers', [{}, {'X-Service-Token': 'wrong'}, {'X-Admin-Token': 'service-secret'}])
+def test_catalog_changes_need_the_service_token(catalog_client, headers):
+    body = {'properties': [{'id': 1, 'price': 400000}]}
+
+    assert catalog_client.put('/api/catalog/properties', json=body, headers=headers).status_code == 403
+    assert catalog_client.delete('/api/catalog/properties/1', headers=headers).status_code == 403
+    assert len(service.catalog_store.catalog) == 0
+
+
+def test_catalog_changes_with_the_service_token(catalog_client):
+    headers = {'X-Service-Token': 'service-secret'}
+    body = {'properties': [{'id': 1, 'price': 400000}]}
+
+    assert catalog_client.put('/api/catalog/properties', json=body, headers=headers).status_code == 200
+    assert catalog_client.delete('/api/catalog/properties/1', headers=headers).status_code == 200
+    assert len(service.catalog_store.catalog) == 0
+
+
+def test_catalog_upsert_rejects_non_numeric_fields(catalog_client):
+    response = catalog_client.put('/api/catalog/properties', headers={'X-Service-Token': 'service-secret'},
+                                  json={'properties': [{'id': 2, 'price': 'call for price'}]})
+
+    assert response.status_code == 400
+    assert 'price' in response.get_json()['error']
+    assert len(service.catalog_store.catalog) == 0
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+import redis
+
+from api.cache import (AsyncResilientCache, CircuitBreaker, CircuitOpen, GuardedRedis, ResilientCache,
+                       create_pool)
+from api.recommender import CatalogStore, PropertyCatalog
+from fake_redis import AsyncFakeRedis, FakeRedis
+
+
+def test_breaker_opens_after_threshold_and_recovers_after_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    # Only one trial call goes through per cool-down
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.stats() == {'state': 'closed', 'failures': 0, 'bypassed': 2}
+
+
+def test_cache_degrades_to_misses_during_outage():
+    client = FakeRedis()
+    cache = ResilientCache(client, CircuitBreaker(failure_threshold=2))
+    cache.setex('key', 60, 'value')
+    client.fail = True
+
+    assert cache.get('key') is None
+    assert cache.get_many(['key', 'other']) == [None, None]
+    assert cache.stats()['state'] == 'open'
+
+    # An open circuit skips Redis entirely
+    calls = client.calls
+    assert not cache.setex('key', 60, 'value')
+    assert client.calls == calls
+
+
+def test_cache_batches_reads_and_writes_in_one_round_trip():
+    client = FakeRedis()
+    cache = ResilientCache(client)
+
+    assert cache.set_many({'a': 1, 'b': 2, 'c': 3}, ttl=60)
+    assert client.calls == 1
+    assert cache.get_many(['a', 'missing', 'c']) == [b'1', None, b'3']
+    assert client.calls == 2
+    assert cache.get_many([]) == [] and cache.set_many({}, ttl=60)
+    assert client.calls == 2
+
+
+def test_guarded_client_fails_fast_while_circuit_is_open():
+    client = FakeRedis()
+    guarded = GuardedRedis(client, CircuitBreaker(failure_threshold=1))
+    client.fail = True
+
+    with pytest.raises(redis.ConnectionError):
+        guarded.get('key')
+    calls = client.calls
+    with pytest.raises(CircuitOpen):
+        guarded.get('key')
+    with pytest.raises(CircuitOpen):
+        guarded.pipeline().set('key', 'value').execute()
+    assert client.calls == calls
+
+
+def test_breaker_is_shared_between_cache_and_stores():
+    client = FakeRedis()
+    breaker = CircuitBreaker(failure_threshold=2)
+    cache = ResilientCache(client, breaker)
+    store = CatalogStore(GuardedRedis(client, breaker), PropertyCatalog())
+    store.upsert([{'id': 1, 'city': 'Austin', 'type': 'house', 'price': 400000}])
+
+    client.fail = True
+    cache.get('a')
+    cache.get('b')
+    calls = client.calls
+
+    # The store keeps serving its local copy without waiting on Redis
+    store.sync()
+    assert client.calls == calls
+    assert store.catalog.ids == ['1']
+    with pytest.raises(redis.RedisError):
+        store.remove('1')
+    assert client.calls == calls
+
+
+def test_async_cache_batches_and_degrades():
+    async def scenario():
+        client = AsyncFakeRedis()
+        cache = AsyncResilientCache(client, CircuitBreaker(failure_threshold=1))
+
+        assert await cache.set_many({'a': 1, 'b': 2}, ttl=60)
+        assert await cache.get_many(['a', 'b', 'c']) == [b'1', b'2', None]
+        assert await cache.get('a') == b'1'
+        assert client.backend.calls == 3
+
+        client.backend.fail = True
+        assert await cache.get('a') is None
+        assert await cache.delete('a') == 0
+        assert cache.stats()['state'] == 'open'
+        assert client.backend.calls == 4
+
+    asyncio.run(scenario())
+
+
+def test_pool_is_bounded_with_tight_timeouts(monkeypatch):
+    monkeypatch.setenv('REDIS_MAX_CONNECTIONS', '8')
+    pool = create_pool('redis://localhost:6379/0')
+    blocking_pool = create_pool('redis://localhost:6379/0', socket_timeout=30)
+
+    assert pool.max_connections == 8
+    assert pool.connection_kwargs['socket_timeout'] == 0.25
+    assert pool.connection_kwargs['socket_connect_timeout'] == 0.25
+    assert blocking_pool.connection_kwargs['socket_timeout'] == 30
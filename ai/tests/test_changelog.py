@@ -0,0 +1,13 @@
+import pytest
+
+from api.changelog import ChangeLogStore
+from fake_redis import FakeRedis
+
+
+def test_store_without_hooks_fails_at_construction():
+    class Incomplete(ChangeLogStore):
+        def _local_keys(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Incomplete(FakeRedis(), 'values', 'changes')
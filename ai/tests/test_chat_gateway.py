@@ -0,0 +1,154 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from api import chat_gateway as gateway
+
+
+class FakeServer:
+    """Socket.IO server stand-in that records emits and can ack them at once"""
+
+    def __init__(self, auto_ack=True):
+        self.auto_ack = auto_ack
+        self.sessions = {}
+        self.emitted = []
+        self.disconnected = []
+
+    def save_session(self, sid, session):
+        self.sessions[sid] = session
+
+    @contextmanager
+    def session(self, sid):
+        yield self.sessions[sid]
+
+    def emit(self, event, data, to=None, callback=None):
+        self.emitted.append((event, data, to))
+        if callback is not None and self.auto_ack:
+            callback()
+
+    def disconnect(self, sid):
+        self.disconnected.append(sid)
+        gateway.disconnect(sid)
+
+    def tokens(self, sid):
+        return [data['token'] for event, data, to in self.emitted if event == 'chat_token' and to == sid]
+
+
+class FakeChatbot:
+    """Replies with numbered chunks and records how many were read"""
+
+    def __init__(self, chunks=5, on_chunk=None):
+        self.chunks = chunks
+        self.on_chunk = on_chunk
+        self.read = 0
+        self.closed = False
+
+    def stream_message(self, message, use_ai, context, admit=None):
+        try:
+            context['last_intent'] = message
+            for i in range(self.chunks):
+                self.read += 1
+                if self.on_chunk:
+                    self.on_chunk(i)
+                yield f"chunk{i} "
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(gateway, 'sio', server)
+    monkeypatch.setattr(gateway, 'stream_windows', {})
+    monkeypatch.setattr(gateway, 'STREAM_WINDOW', 2)
+    monkeypatch.setattr(gateway, 'STREAM_ACK_TIMEOUT', 0.05)
+    return server
+
+
+def connect(sid, context=None, user=None):
+    environ = {'REMOTE_ADDR': '10.0.0.1', **({'HTTP_X_USER_ID': user} if user else {})}
+    gateway.connect(sid, environ, {'context': context or {}})
+
+
+def test_acked_reply_is_streamed_in_full(server, monkeypatch):
+    bot = FakeChatbot()
+    monkeypatch.setattr(gateway, 'chatbot', bot)
+    connect('a')
+
+    assert gateway.chat_message('a', {'message': 'hello', 'id': 7}) == {'success': True}
+
+    assert server.tokens('a') == [f"chunk{i} " for i in range(5)]
+    event, response, _ = server.emitted[-1]
+    assert event == 'chat_response' and response['id'] == 7
+    assert response['response'] == ''.join(server.tokens('a'))
+    assert bot.closed
+
+
+def test_client_that_stops_acking_is_disconnected(server, monkeypatch):
+    server.auto_ack = False
+    bot = FakeChatbot()
+    monkeypatch.setattr(gateway, 'chatbot', bot)
+    connect('a')
+
+    assert gateway.chat_message('a', {'message': 'hello'}) == {'error': 'Client too slow'}
+
+    # Only a window's worth of chunks is read and sent
+    assert len(server.tokens('a')) == 2
+    assert bot.read == 2 and bot.closed
+    assert server.disconnected == ['a']
+    assert 'a' not in gateway.stream_windows
+
+
+def test_disconnect_mid_stream_stops_reading_at_once(server, monkeypatch):
+    server.auto_ack = False
+    monkeypatch.setattr(gateway, 'STREAM_ACK_TIMEOUT', 5)
+    bot = FakeChatbot(chunks=100)
+    monkeypatch.setattr(gateway, 'chatbot', bot)
+    connect('a')
+
+    # The client goes away while the reply waits for acks
+    threading.Timer(0.05, gateway.disconnect, args=('a',)).start()
+    started = time.monotonic()
+    result = gateway.chat_message('a', {'message': 'hello'})
+
+    assert result == {'error': 'Client disconnected'}
+    assert time.monotonic() - started < 1
+    assert bot.read == 2 and bot.closed
+    assert server.disconnected == []
+
+
+def test_message_after_disconnect_is_refused(server, monkeypatch):
+    bot = FakeChatbot()
+    monkeypatch.setattr(gateway, 'chatbot', bot)
+    connect('a')
+    gateway.disconnect('a')
+
+    assert gateway.chat_message('a', {'message': 'hello'}) == {'error': 'Not connected'}
+    assert bot.read == 0
+
+
+def test_each_connection_keeps_its_own_context(server, monkeypatch):
+    monkeypatch.setattr(gateway, 'chatbot', FakeChatbot(chunks=1))
+    connect('a', context={'budget': 400000}, user='alice')
+    connect('b')
+
+    gateway.chat_message('a', {'message': 'pricing'})
+    gateway.chat_message('b', {'message': 'greeting'})
+
+    assert server.sessions['a'] == {'context': {'budget': 400000, 'last_intent': 'pricing'}, 'user': 'alice'}
+    assert server.sessions['b'] == {'context': {'last_intent': 'greeting'}, 'user': '10.0.0.1'}
+
+    assert gateway.reset_context('a') == {'success': True}
+    assert server.sessions['a']['context'] == {}
+    assert server.sessions['b']['context'] == {'last_intent': 'greeting'}
+
+
+def test_window_release_never_exceeds_its_size():
+    window = gateway.StreamWindow(1)
+    window.release()
+    assert window.acquire(0.01)
+    assert not window.acquire(0.01)
+    window.release()
+    assert window.acquire(0.01)
@@ -0,0 +1,102 @@
+from contextlib import contextmanager, nullcontext
+from types import SimpleNamespace
+
+import pytest
+
+from api.admission import LoadShed
+from chatbot import main
+from chatbot.main import PropertyChatbot
+
+BUSY = "I'm getting a lot of questions right now. Please try again in a moment."
+
+
+class ListLog:
+    def __init__(self):
+        self.records = []
+
+    def log(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def chatbot(monkeypatch):
+    bot = PropertyChatbot()
+    bot.interaction_log = ListLog()
+    monkeypatch.setattr(bot, 'stream_ai_response', lambda message, context: iter(['Sure', ', ', 'here']))
+    monkeypatch.setattr(bot, 'complete_ai_response', lambda message, context: ('Sure, here', 42))
+    return bot
+
+
+def shed():
+    raise LoadShed('queue_full')
+
+
+def greetings(bot):
+    return next(intent for intent in bot.intents['intents'] if intent['tag'] == 'greeting')['responses']
+
+
+def test_admitted_ai_reply_follows_intent_response(chatbot):
+    reply = ''.join(chatbot.stream_message('hello', use_ai=True, context={}, admit=nullcontext))
+
+    intent_reply, ai_reply = reply.split('\n\n')
+    assert intent_reply in greetings(chatbot)
+    assert ai_reply == 'Sure, here'
+    assert chatbot.interaction_log.records[-1]['shed_reason'] is None
+
+
+def test_admission_slot_is_released_before_chunks_are_yielded(chatbot):
+    held = []
+
+    @contextmanager
+    def admit():
+        held.append(True)
+        yield
+        held[-1] = False
+
+    # The intent response comes before admission, the AI chunks after the release
+    for chunk in chatbot.stream_message('hello', use_ai=True, context={}, admit=admit):
+        assert True not in held
+    assert held == [False]
+    assert chatbot.interaction_log.records[-1]['chunks'] == 3
+
+
+def test_shed_ai_call_keeps_intent_response(chatbot):
+    reply = ''.join(chatbot.stream_message('hello', use_ai=True, context={}, admit=shed))
+
+    assert reply in greetings(chatbot)
+    assert chatbot.interaction_log.records[-1]['shed_reason'] == 'queue_full'
+
+
+def test_shed_ai_call_without_intent_sends_busy_message(chatbot):
+    reply = ''.join(chatbot.stream_message('zzqx blorp', use_ai=True, context={}, admit=shed))
+
+    assert reply == BUSY
+    assert chatbot.interaction_log.records[-1]['intent'] is None
+
+
+def test_streamed_turn_logs_chunks_without_usage(chatbot):
+    ''.join(chatbot.stream_message('zzqx blorp', use_ai=True, context={}))
+
+    record = chatbot.interaction_log.records[-1]
+    assert record['chunks'] == 3
+    assert record['tokens'] is None
+
+
+def test_non_streamed_turn_logs_reported_usage(chatbot):
+    reply = chatbot.process_message('zzqx blorp', use_ai=True, context={})
+
+    record = chatbot.interaction_log.records[-1]
+    assert reply == 'Sure, here'
+    assert record['tokens'] == 42
+    assert record['chunks'] is None
+
+
+def test_completion_reports_openai_usage(monkeypatch):
+    def create(**kwargs):
+        message = SimpleNamespace(content=' Sure, here ')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=42))
+
+    monkeypatch.setattr(main, 'OPENAI_AVAILABLE', True)
+    monkeypatch.setattr(main, 'openai', SimpleNamespace(ChatCompletion=SimpleNamespace(create=create)), raising=False)
+
+    assert PropertyChatbot().complete_ai_response('hello', {}) == ('Sure, here', 42)
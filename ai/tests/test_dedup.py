@@ -0,0 +1,144 @@
+import time
+
+import pytest
+
+from api.dedup import NearDuplicateIndex, SignatureStore, normalize_street
+from api.locations import LocationResolver
+from fake_redis import FakeRedis
+
+DESCRIPTION = ("Bright three bedroom craftsman bungalow with a renovated kitchen, quartz counters, "
+               "original hardwood floors, a shaded backyard with a deck and a detached garage, "
+               "walking distance to parks, cafes and the elementary school")
+
+
+@pytest.fixture(scope='module')
+def index_factory():
+    resolver = LocationResolver()
+    return lambda: NearDuplicateIndex(location_resolver=resolver)
+
+
+def listing(listing_id, **fields):
+    return {
+        'id': listing_id, 'title': 'Charming craftsman bungalow', 'description': DESCRIPTION,
+        'address': '12 Oak St', 'city': 'Austin', 'type': 'house', 'bedrooms': 3, 'bathrooms': 2,
+        'price': 500000, 'area': 1800, **fields
+    }
+
+
+def match(index, original, candidate):
+    """Whether the index would reuse original's analysis for candidate"""
+    if not (index.comparable(original) and index.comparable(candidate)):
+        return False
+    index.add(original['id'], index.signature(original))
+    found = index.query(index.signature(candidate))
+    return bool(found) and index.same_property(index.identity(candidate), index.identity(original))
+
+
+def test_lightly_edited_relisting_is_the_same_property(index_factory):
+    relisted = listing(2, description=DESCRIPTION.replace('Bright', 'Sunny').replace('deck', 'patio'),
+                       address='12 Oak Street', price=489000)
+
+    assert match(index_factory(), listing(1), relisted)
+
+
+@pytest.mark.parametrize('changes', [
+    {'bedrooms': 4, 'price': 650000},
+    {'bedrooms': 4},
+    {'bathrooms': 1},
+    {'type': 'condo'},
+    {'address': '14 Oak St'},
+    {'city': 'Dallas'},
+    {'price': 600000},
+    {'price': None},
+])
+def test_similar_text_with_different_attributes_is_not_reused(index_factory, changes):
+    index = index_factory()
+    original = listing(1)
+    candidate = listing(2, **changes)
+
+    # The text alone is similar enough to be a candidate...
+    index.add('1', index.signature(original))
+    assert index.query(index.signature(candidate))
+    # ...but it is not the same property
+    assert not match(index_factory(), original, candidate)
+
+
+def test_listings_without_text_are_never_matched(index_factory):
+    first = {'id': 1, 'type': 'condo', 'city': 'Austin', 'bedrooms': 2, 'bathrooms': 1, 'price': 300000}
+    second = dict(first, id=2, price=305000)
+    index = index_factory()
+
+    assert not index.comparable(first)
+    assert not match(index, first, second)
+
+
+def test_street_addresses_are_normalized():
+    assert normalize_street('12 Oak Street, Austin, TX 78701') == '12 oak st'
+    assert normalize_street('12 oak st.') == '12 oak st'
+    assert normalize_street('12 N. Lamar Blvd Apartment 4') == '12 n lamar blvd apt 4'
+    assert normalize_street(None) == ''
+
+
+def test_dedupe_clusters_only_the_same_property(index_factory):
+    clusters = index_factory().dedupe([
+        listing(1),
+        listing(2, description=DESCRIPTION.replace('Bright', 'Sunny')),
+        listing(3, address='14 Oak St'),
+        listing(4, bedrooms=4, price=650000),
+        {'id': 5, 'type': 'condo', 'city': 'Austin', 'bedrooms': 2, 'bathrooms': 1, 'price': 300000},
+        {'id': 6, 'type': 'condo', 'city': 'Austin', 'bedrooms': 2, 'bathrooms': 1, 'price': 305000}
+    ])
+
+    assert [(cluster['canonical_id'], [item['property_id'] for item in cluster['duplicates']])
+            for cluster in clusters] == [('1', ['2'])]
+
+
+def test_signatures_are_shared_between_processes(index_factory):
+    client = FakeRedis()
+    writer = SignatureStore(client, index_factory())
+    reader = SignatureStore(client, index_factory())
+    reader.sync()
+
+    signature = writer.index.signature(listing(1))
+    writer.add('1', signature)
+    reader.sync()
+
+    assert reader.index.query(signature)[0] == '1'
+
+
+def test_signatures_expire_for_every_process(index_factory):
+    client = FakeRedis()
+    writer = SignatureStore(client, index_factory(), ttl=60)
+    reader = SignatureStore(client, index_factory(), ttl=60)
+    signature = writer.index.signature(listing(1))
+    writer.add('1', signature)
+    reader.sync()
+    assert reader.index.query(signature)
+
+    assert writer.expire(time.time() + 30) == []
+    assert writer.expire(time.time() + 61) == ['1']
+    reader.sync()
+
+    assert len(reader.index) == len(writer.index) == 0
+    assert client.hgetall(writer.values_key) == {}
+    assert client.zrangebyscore(writer.expiry_key, '-inf', '+inf') == []
+
+
+def test_adding_a_signature_expires_stale_ones(index_factory):
+    client = FakeRedis()
+    store = SignatureStore(client, index_factory(), ttl=0)
+    store.add('1', store.index.signature(listing(1)))
+    store.add('2', store.index.signature(listing(2, address='14 Oak St')))
+
+    assert list(store.index.signatures) == ['2']
+
+
+def test_signatures_indexed_during_an_outage_expire_locally(index_factory):
+    client = FakeRedis()
+    store = SignatureStore(client, index_factory(), ttl=0)
+    client.fail = True
+    store.add('1', store.index.signature(listing(1)))
+    assert list(store.index.signatures) == ['1']
+
+    store.add('2', store.index.signature(listing(2, address='14 Oak St')))
+    assert list(store.index.signatures) == ['2']
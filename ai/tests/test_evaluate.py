@@ -0,0 +1,35 @@
+import numpy as np
+
+from chatbot.evaluate import IntentEvaluator, choose_configuration, load_corpus, DEFAULT_CORPUS
+from chatbot.main import PropertyChatbot
+
+
+def test_folds_are_stratified_and_partition_the_corpus():
+    evaluator = IntentEvaluator(PropertyChatbot(), load_corpus(DEFAULT_CORPUS))
+    folds = evaluator.folds(5)
+
+    assert sorted(np.concatenate(folds).tolist()) == list(range(len(evaluator.labels)))
+    for label in set(evaluator.labels):
+        per_fold = [sum(evaluator.labels[i] == label for i in fold) for fold in folds]
+        assert max(per_fold) - min(per_fold) <= 1
+
+
+def test_held_out_accuracy_is_not_in_sample():
+    evaluator = IntentEvaluator(PropertyChatbot(), load_corpus(DEFAULT_CORPUS))
+    report = evaluator.evaluate(folds=5)[-1]
+    best = report['best']
+
+    assert len(best['fold_accuracies']) == 5
+    assert best['held_out_accuracy'] <= best['in_sample_accuracy']
+
+
+def test_configuration_is_chosen_on_held_out_accuracy():
+    reports = [
+        {'backend': 'overlap', 'accuracy': 0.6, 'latency_ms': {'p50': 1.0},
+         'best': {'in_sample_accuracy': 0.9, 'held_out_accuracy': 0.75}},
+        {'backend': 'spacy', 'accuracy': 0.7, 'latency_ms': {'p50': 9.0},
+         'best': {'in_sample_accuracy': 0.88, 'held_out_accuracy': 0.85}}
+    ]
+
+    assert choose_configuration(reports, 0.8)['backend'] == 'spacy'
+    assert choose_configuration(reports, 0.9) is None
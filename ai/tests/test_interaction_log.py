@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from api.interaction_log import InteractionLogger, read_interactions
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+
+def log_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.jsonl.gz'))
+
+
+@pytest.fixture
+def make_logger(tmp_path):
+    loggers = []
+
+    def make(**settings):
+        settings.setdefault('flush_interval', 0.01)
+        logger = InteractionLogger(str(tmp_path), **settings)
+        loggers.append(logger)
+        return logger
+
+    yield make
+    for logger in loggers:
+        logger.close()
+
+
+def test_records_are_written_in_batches_and_read_back(tmp_path, make_logger):
+    logger = make_logger(batch_size=3)
+    for i in range(7):
+        assert logger.log({'kind': 'chat_turn', 'n': i})
+    logger.close()
+
+    records = list(read_interactions(str(tmp_path)))
+    assert [record['n'] for record in records] == list(range(7))
+    assert all('timestamp' in record for record in records)
+    assert logger.stats()['written'] == 7
+    # One gzip member per batch of at most three records
+    with open(os.path.join(tmp_path, log_files(tmp_path)[0]), 'rb') as file:
+        assert file.read().count(b'\x1f\x8b\x08') >= 3
+
+
+def test_records_are_dropped_and_counted_when_the_writer_falls_behind(make_logger):
+    logger = make_logger(max_queue=1)
+    release = threading.Event()
+    write = logger._write
+
+    def slow_write(batch):
+        release.wait()
+        write(batch)
+
+    logger._write = slow_write
+    assert logger.log({'n': 1})
+    wait_for(lambda: logger._queue.empty())
+    assert logger.log({'n': 2})
+    assert not logger.log({'n': 3})
+
+    assert logger.stats()['dropped'] == 1
+    release.set()
+    logger.close()
+    assert logger.stats()['written'] == 2
+
+
+@pytest.mark.parametrize('settings', [{'rotate_bytes': 1}, {'rotate_seconds': 0}])
+def test_rotation_opens_a_new_file_even_within_the_same_second(tmp_path, make_logger, settings):
+    logger = make_logger(**settings)
+    for i in range(3):
+        logger.log({'n': i})
+        wait_for(lambda: logger.written == i + 1)
+    logger.close()
+
+    # The first batch opens a file; each later one rotates to a new one
+    assert len(log_files(tmp_path)) == 3
+    assert [record['n'] for record in read_interactions(str(tmp_path))] == [0, 1, 2]
+
+
+def test_read_filters_by_kind_and_time(tmp_path, make_logger):
+    logger = make_logger()
+    logger.log({'kind': 'chat_turn', 'timestamp': '2024-01-01T00:00:00'})
+    logger.log({'kind': 'chat', 'timestamp': '2024-01-02T00:00:00'})
+    logger.log({'kind': 'chat_turn', 'timestamp': '2024-01-03T00:00:00'})
+    logger.close()
+
+    turns = list(read_interactions(str(tmp_path), kinds=['chat_turn'], since='2024-01-02'))
+    assert [record['timestamp'] for record in turns] == ['2024-01-03T00:00:00']
+
+
+def test_read_skips_a_truncated_last_member(tmp_path):
+    complete = gzip.compress(b'{"n": 1}\n')
+    partial = gzip.compress(b'{"n": 2}\n')[:14]
+    with open(tmp_path / 'interactions-20240101-000000-1-000001.jsonl.gz', 'wb') as file:
+        file.write(complete + partial)
+    with open(tmp_path / 'interactions-20240101-000001-1-000002.jsonl.gz', 'wb') as file:
+        file.write(gzip.compress(json.dumps({'n': 3}).encode('utf-8') + b'\n'))
+
+    assert [record['n'] for record in read_interactions(str(tmp_path))] == [1, 3]
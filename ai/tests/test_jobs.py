@@ -0,0 +1,183 @@
+import threading
+import time
+
+import pytest
+
+from api import jobs
+from api.jobs import JobQueue
+from fake_redis import FakeRedis
+
+
+class WorkerCrash(BaseException):
+    """Escapes the worker's error handling, like a killed process"""
+
+
+@pytest.fixture
+def queue():
+    job_queue = JobQueue(FakeRedis(), lease_seconds=0.1, callback_hosts=['backend', '.example.com'])
+    job_queue.register('echo', lambda payload: {'echo': payload})
+    return job_queue
+
+
+def test_identical_jobs_are_deduplicated(queue):
+    first = queue.enqueue('echo', {'id': 1})
+    second = queue.enqueue('echo', {'id': 1})
+
+    assert first['id'] == second['id']
+    assert second['status'] == 'queued'
+    assert queue.process_next(timeout=0.1)['result'] == {'echo': {'id': 1}}
+    assert queue.process_next(timeout=0.1) is None
+
+
+def test_jobs_run_by_priority(queue):
+    low = queue.enqueue('echo', {'id': 'low'}, priority='low')
+    high = queue.enqueue('echo', {'id': 'high'}, priority='high')
+
+    assert queue.process_next(timeout=0.1)['id'] == high['id']
+    assert queue.process_next(timeout=0.1)['id'] == low['id']
+
+
+def test_only_the_worker_pop_uses_the_blocking_client():
+    client = FakeRedis()
+    used = []
+
+    class BlockingClient:
+        def __getattr__(self, name):
+            used.append(name)
+            return getattr(client, name)
+
+    queue = JobQueue(client, blocking_client=BlockingClient())
+    queue.register('echo', lambda payload: {'echo': payload})
+    job = queue.enqueue('echo', {'id': 1})
+    queue.get(job['id'])
+    assert used == []
+
+    assert queue.process_next(timeout=0.1)['status'] == 'done'
+    assert used == ['bzpopmin']
+
+
+def test_failed_job_is_retried_on_resubmit(queue):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return {'ok': True}
+
+    queue.register('flaky', flaky)
+    queue.enqueue('flaky', {})
+    assert queue.process_next(timeout=0.1)['status'] == 'failed'
+
+    assert queue.enqueue('flaky', {})['status'] == 'queued'
+    assert queue.process_next(timeout=0.1)['status'] == 'done'
+
+
+def test_job_of_crashed_worker_is_requeued(queue):
+    def crash(payload):
+        raise WorkerCrash()
+
+    queue.register('crashy', crash)
+    job = queue.enqueue('crashy', {})
+    with pytest.raises(WorkerCrash):
+        queue.process_next(timeout=0.1)
+
+    # Still leased, so deduplication returns the running job
+    assert queue.enqueue('crashy', {})['status'] == 'running'
+
+    time.sleep(0.15)
+    queue.register('crashy', lambda payload: {'ok': True})
+    assert queue.enqueue('crashy', {})['status'] == 'queued'
+
+    finished = queue.process_next(timeout=0.1)
+    assert finished['id'] == job['id']
+    assert finished['status'] == 'done'
+    assert finished['attempts'] == 2
+
+
+def test_job_is_failed_after_max_attempts(queue):
+    def crash(payload):
+        raise WorkerCrash()
+
+    queue.register('crashy', crash)
+    job = queue.enqueue('crashy', {})
+    for _ in range(queue.max_attempts):
+        with pytest.raises(WorkerCrash):
+            queue.process_next(timeout=0.1)
+        time.sleep(0.15)
+
+    assert queue.requeue_stale() == 0
+    assert queue.get(job['id'])['status'] == 'failed'
+
+
+def test_lease_is_renewed_while_job_runs(queue):
+    stale_seen = []
+
+    def slow(payload):
+        time.sleep(0.3)
+        stale_seen.append(queue.requeue_stale())
+        return {'ok': True}
+
+    queue.register('slow', slow)
+    queue.enqueue('slow', {})
+
+    assert queue.process_next(timeout=0.1)['status'] == 'done'
+    assert stale_seen == [0]
+
+
+@pytest.mark.parametrize('url, allowed', [
+    ('https://backend/hooks/ai', True),
+    ('http://backend:5000/hooks/ai', True),
+    ('https://api.example.com/hooks', True),
+    ('https://example.com.evil.net/hooks', False),
+    ('https://169.254.169.254/latest/meta-data', False),
+    ('http://localhost:6379/', False),
+    ('ftp://backend/hooks', False),
+    ('backend/hooks', False),
+])
+def test_callback_urls_are_checked_against_allow_list(queue, url, allowed):
+    assert queue.callback_allowed(url) is allowed
+    if not allowed:
+        with pytest.raises(ValueError):
+            queue.enqueue('echo', {'url': url}, callback_url=url)
+
+
+def test_callbacks_rejected_without_allow_list():
+    job_queue = JobQueue(FakeRedis())
+    job_queue.register('echo', lambda payload: payload)
+
+    with pytest.raises(ValueError):
+        job_queue.enqueue('echo', {}, callback_url='https://backend/hooks/ai')
+
+
+def test_finished_job_is_posted_to_callback(queue, monkeypatch):
+    posted = []
+    monkeypatch.setattr(jobs.requests, 'post', lambda url, **kwargs: posted.append((url, kwargs)))
+
+    queue.enqueue('echo', {'id': 1}, callback_url='https://backend/hooks/ai')
+    queue.process_next(timeout=0.1)
+
+    assert len(posted) == 1
+    url, kwargs = posted[0]
+    assert url == 'https://backend/hooks/ai'
+    assert kwargs['json']['success'] is True
+    assert kwargs['allow_redirects'] is False
+
+
+def test_callback_for_already_done_job_does_not_block_the_request(queue, monkeypatch):
+    posted = threading.Event()
+
+    def slow_post(url, **kwargs):
+        time.sleep(0.3)
+        posted.set()
+
+    monkeypatch.setattr(jobs.requests, 'post', slow_post)
+    queue.enqueue('echo', {'id': 1})
+    queue.process_next(timeout=0.1)
+
+    started = time.monotonic()
+    job = queue.enqueue('echo', {'id': 1}, callback_url='https://backend/hooks/ai')
+
+    assert job['status'] == 'done'
+    assert time.monotonic() - started < 0.2
+    assert posted.wait(2)
@@ -0,0 +1,99 @@
+import pytest
+
+from api.locations import LocationResolver, edit_distance, normalize_location
+
+
+@pytest.fixture(scope='module')
+def resolver():
+    return LocationResolver()
+
+
+@pytest.mark.parametrize('location, region_id', [
+    # Names, aliases and qualifiers
+    ('Austin', 'us-tx-austin'),
+    ('Austin, TX', 'us-tx-austin'),
+    ('austin tx', 'us-tx-austin'),
+    ('Downtown Austin', 'us-tx-austin'),
+    ('Houston Texas 77002', 'us-tx-houston'),
+    ('123 Main St, Austin, TX 78701', 'us-tx-austin'),
+    ('Deep Ellum', 'us-tx-dallas'),
+    ('Portland, ME', 'us-me-portland'),
+    ('Portland', 'us-or-portland'),
+    # Typos
+    ('Pheonix', 'us-az-phoenix'),
+    ('Sacremento', 'us-ca-sacramento'),
+    ('Philadelpia', 'us-pa-philadelphia'),
+    ('San Fransisco', 'us-ca-san-francisco'),
+    ('Los Angelas', 'us-ca-los-angeles'),
+    ('Albuquerqe', 'us-nm-albuquerque'),
+    ('Louisvile KY', 'us-ky-louisville'),
+    ('Pittsburg PA', 'us-pa-pittsburgh'),
+])
+def test_resolves_known_places(resolver, location, region_id):
+    assert resolver.region_id(location) == region_id
+
+
+@pytest.mark.parametrize('location', [
+    # Different places that look like known names
+    'Newark',
+    'Newark NJ',
+    'Irvine',
+    'Irvine, CA',
+    'Dallas Center',
+    'Boston Heights',
+    'Houstonia',
+    'Queensbury',
+    'Austintown',
+    'Pittsburg, KS',
+    # Unknown places and noise
+    'Springfield',
+    'Nowhere Special',
+    '',
+    '!!!',
+])
+def test_unknown_places_do_not_resolve(resolver, location):
+    assert resolver.region_id(location) is None
+
+
+@pytest.mark.parametrize('location, region_id', [
+    # Separate municipalities keep their own region rather than the nearby big city's
+    ('Santa Fe, NM', 'us-nm-santa-fe'),
+    ('Boulder', 'us-co-boulder'),
+    ('Ann Arbor, MI', 'us-mi-ann-arbor'),
+    ('Provo', 'us-ut-provo'),
+    ('Plano, TX', 'us-tx-plano'),
+    ('Irving', 'us-tx-irving'),
+    ('Chapel Hill', 'us-nc-chapel-hill'),
+    ('Durham NC', 'us-nc-durham'),
+    ('Santa Monica', 'us-ca-santa-monica'),
+    ('Pasadena, CA', 'us-ca-pasadena'),
+    ('South Beach', 'us-fl-miami-beach'),
+    # Names shared with other states need the state
+    ('Arlington, TX', 'us-tx-arlington'),
+    ('Cambridge MA', 'us-ma-cambridge'),
+])
+def test_nearby_cities_are_separate_regions(resolver, location, region_id):
+    assert resolver.region_id(location) == region_id
+
+
+@pytest.mark.parametrize('location', [
+    # Metro areas span several regions
+    'Bay Area', 'Twin Cities', 'Research Triangle', 'DFW', 'Silicon Valley',
+    # Shared names without a state, or in another state
+    'Arlington', 'Arlington, VA', 'Cambridge', 'Pasadena', 'Pasadena, TX', 'Franklin',
+])
+def test_metros_and_ambiguous_names_do_not_resolve(resolver, location):
+    assert resolver.region_id(location) is None
+
+
+def test_aliases_never_name_another_region(resolver):
+    names = {normalize_location(region['name']) for region in resolver.regions.values()}
+    for region in resolver.regions.values():
+        for alias in region['aliases']:
+            assert normalize_location(alias) not in names - {normalize_location(region['name'])}, alias
+
+
+def test_edit_distance_counts_transpositions_as_one_edit():
+    assert edit_distance('phoenix', 'pheonix') == 1
+    assert edit_distance('houston', 'houstonia') == 2
+    assert edit_distance('', 'abc') == 3
@@ -0,0 +1,98 @@
+import json
+import time
+
+import pytest
+
+from api.profiler import SamplingProfiler
+from fake_redis import FakeRedis
+
+
+@pytest.fixture
+def profiler():
+    profiler = SamplingProfiler(FakeRedis(), max_profiles=3)
+    profiler.configure({'enabled': True, 'sample_rate': 0.0, 'slow_threshold_ms': 0.0, 'interval_ms': 1.0})
+    return profiler
+
+
+def busy(milliseconds):
+    deadline = time.perf_counter() + milliseconds / 1000
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_requests_are_selected_by_sample_rate(profiler):
+    assert profiler.start('GET', '/health') is None
+
+    profiler.configure({'sample_rate': 1.0})
+    profile = profiler.start('GET', '/health')
+    assert profile.sampled
+    profiler.stop(profile)
+    assert profiler.profiles()[0]['reason'] == 'sampled'
+
+    profiler.configure({'enabled': False})
+    assert profiler.start('GET', '/health') is None
+
+
+def test_only_slow_unsampled_requests_are_kept(profiler):
+    profiler.configure({'slow_threshold_ms': 20.0})
+
+    fast = profiler.start('GET', '/fast')
+    profiler.stop(fast)
+    slow = profiler.start('GET', '/slow')
+    busy(30)
+    profiler.stop(slow)
+
+    assert [(profile['path'], profile['reason']) for profile in profiler.profiles()] == [('/slow', 'slow')]
+
+
+def test_sampled_stacks_include_the_request_code(profiler):
+    profiler.configure({'sample_rate': 1.0})
+    profile = profiler.start('GET', '/busy')
+    busy(50)
+    profiler.stop(profile)
+
+    stacks = profiler.profiles()[0]['stacks']
+    assert any(stack.endswith('test_profiler.py:busy') for stack in stacks)
+
+
+def test_stored_profiles_are_a_bounded_ring(profiler):
+    profiler.configure({'sample_rate': 1.0})
+    for i in range(5):
+        profiler.stop(profiler.start('GET', f"/{i}"))
+
+    assert [profile['path'] for profile in profiler.profiles()] == ['/4', '/3', '/2']
+    profiler.clear()
+    assert profiler.profiles() == []
+
+
+def test_collapsed_output_aggregates_stacks(profiler):
+    for path, stacks in (('/a', {'app:run;app:slow': 3, 'app:run': 1}), ('/b', {'app:run;app:slow': 2})):
+        profiler.redis.lpush(profiler.profiles_key, json.dumps({'path': path, 'stacks': stacks}))
+
+    assert profiler.collapsed() == 'app:run;app:slow 5\napp:run 1'
+    assert profiler.collapsed('/b') == 'app:run;app:slow 2'
+
+
+@pytest.mark.parametrize('updates', [
+    {'enabled': 'false'},
+    {'enabled': 1},
+    {'sample_rate': 'lots'},
+    {'sample_rate': True},
+    {'sample_rate': 2},
+    {'interval_ms': 0.5},
+    {'slow_threshold_ms': float('nan')},
+    {'unknown': 1},
+])
+def test_invalid_settings_are_rejected(profiler, updates):
+    before = dict(profiler.config)
+
+    with pytest.raises(ValueError):
+        profiler.configure(updates)
+    assert profiler.refresh_config(force=True) == before
+
+
+def test_unsupported_process_never_profiles(profiler):
+    profiler.configure({'sample_rate': 1.0})
+    profiler.supported = False
+
+    assert profiler.start('GET', '/health') is None
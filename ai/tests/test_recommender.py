@@ -0,0 +1,129 @@
+import pytest
+
+from api.recommender import PropertyCatalog, CatalogStore
+from fake_redis import FakeRedis
+
+
+def listing(property_id, **fields):
+    return {'id': property_id, 'type': 'house', 'city': 'Austin', 'bedrooms': 3, 'bathrooms': 2,
+            'price': 400000, **fields}
+
+
+def test_ranks_by_weighted_preferences():
+    catalog = PropertyCatalog()
+    catalog.upsert(listing(1, price=390000))
+    catalog.upsert(listing(2, price=600000))
+    catalog.upsert(listing(3, price=380000, type='condo'))
+
+    ranked = catalog.recommend({'budget': 400000, 'propertyType': 'house', 'bedrooms': 3})
+
+    assert [item['property_id'] for item in ranked] == ['1', '3', '2']
+    assert ranked[0]['breakdown']['propertyType'] == 1.0
+
+
+def test_missing_price_scores_zero_for_budget():
+    catalog = PropertyCatalog()
+    catalog.upsert(listing(1, price=None))
+    catalog.upsert(listing(2, price=0))
+    catalog.upsert(listing(3, price=380000))
+
+    ranked = {item['property_id']: item for item in catalog.recommend({'budget': 400000})}
+
+    assert ranked['1']['breakdown']['budget'] == 0.0
+    assert ranked['2']['breakdown']['budget'] == 0.0
+    assert ranked['3']['breakdown']['budget'] == pytest.approx(0.975)
+
+
+def test_remove_moves_last_row_into_slot():
+    catalog = PropertyCatalog(capacity=2)
+    for property_id in (1, 2, 3):
+        catalog.upsert(listing(property_id, price=100000 * property_id))
+
+    assert catalog.remove(1)
+    assert not catalog.remove(1)
+    assert sorted(catalog.ids) == ['2', '3']
+    assert {item['property_id'] for item in catalog.recommend({'budget': 300000})} == {'2', '3'}
+
+
+def test_stores_share_changes_between_processes():
+    client = FakeRedis()
+    first = CatalogStore(client, PropertyCatalog())
+    second = CatalogStore(client, PropertyCatalog())
+    second.sync()
+
+    first.upsert([listing(1), listing(2)])
+    second.sync()
+    assert sorted(second.catalog.ids) == ['1', '2']
+
+    first.remove('1')
+    first.upsert([listing(2, price=500000)])
+    second.sync()
+    assert second.catalog.ids == ['2']
+    assert second.catalog.features[0][0] == 500000
+
+
+def test_change_stream_is_capped_and_lagging_process_reloads():
+    client = FakeRedis()
+    writer = CatalogStore(client, PropertyCatalog(), max_changes=5)
+    lagging = CatalogStore(client, PropertyCatalog(), max_changes=5)
+    lagging.sync()
+
+    for property_id in range(20):
+        writer.upsert([listing(property_id)])
+    writer.remove('0')
+
+    assert len(client.xrange(writer.changes_key)) <= 5
+
+    lagging.sync()
+    assert sorted(lagging.catalog.ids, key=int) == [str(i) for i in range(1, 20)]
+
+    # A new process loads the current hash rather than the change history
+    fresh = CatalogStore(client, PropertyCatalog(), max_changes=5)
+    fresh.sync()
+    assert sorted(fresh.catalog.ids, key=int) == [str(i) for i in range(1, 20)]
+
+
+@pytest.mark.parametrize('fields', [
+    {'price': 'call for price'},
+    {'bedrooms': 'three'},
+    {'area': -1},
+    {'price': 'nan'},
+    {'bathrooms': True},
+])
+def test_invalid_listing_is_rejected_before_anything_is_written(fields):
+    client = FakeRedis()
+    store = CatalogStore(client, PropertyCatalog())
+
+    with pytest.raises(ValueError):
+        store.upsert([listing(1), listing(2, **fields)])
+
+    assert client.hgetall(store.values_key) == {}
+    assert len(store.catalog) == 0
+
+
+def test_numeric_strings_are_coerced():
+    store = CatalogStore(FakeRedis(), PropertyCatalog())
+    store.upsert([listing(1, price='450000', bedrooms='3', area='')])
+
+    assert store.catalog.features[0][0] == 450000
+
+
+def test_invalid_stored_listing_is_skipped_without_stalling_replay():
+    client = FakeRedis()
+    writer = CatalogStore(client, PropertyCatalog())
+    reader = CatalogStore(client, PropertyCatalog())
+    writer.upsert([listing(1), listing(2)])
+    reader.sync()
+
+    # A listing written before validation existed
+    pipe = client.pipeline()
+    pipe.hset(writer.values_key, '2', '{"id": 2, "price": "call for price"}')
+    writer._log_changes(pipe, ['2'])
+    pipe.execute()
+    writer.upsert([listing(3)])
+
+    reader.sync()
+    assert sorted(reader.catalog.ids) == ['1', '3']
+    fresh = CatalogStore(client, PropertyCatalog())
+    fresh.sync()
+    assert sorted(fresh.catalog.ids) == ['1', '3']